@@ -12,6 +12,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import config
+from utils.db_helper import ensure_strategy_name_index, start_db_maintenance
 
 # ============ 页面配置 ============
 st.set_page_config(
@@ -868,6 +869,12 @@ def main():
     # 初始化会话状态
     init_session_state()
 
+    # 补建策略名唯一索引（进程内只检查一次）
+    ensure_strategy_name_index()
+
+    # 启动后台数据库维护（进程内只启动一次）
+    start_db_maintenance()
+
     # 侧边栏导航
     with st.sidebar:
         st.markdown(f"### {config.APP_NAME}")
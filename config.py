@@ -50,6 +50,13 @@ SCREENER_FIELD_DICT_FILE = os.path.abspath(
     )
 )
 
+# 连接池大小
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+
+# 后台数据库维护（WAL 检查点 + 统计信息更新）的间隔（秒），设为0关闭
+DB_MAINTENANCE_INTERVAL = int(os.getenv('DB_MAINTENANCE_INTERVAL', 600))
+
 # ============ baostock配置 ============
 BAOSTOCK_URL = "http://baostock.com/selenium/api"
 
@@ -15,7 +15,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import config
 from utils.db_helper import (
-    get_db_connection, execute_insert, execute_query,
+    get_db_connection, get_db_transaction, execute_insert, execute_query,
     get_db_info, check_db_exists, execute_delete
 )
 from utils.baostock_client import BaostockClient
@@ -857,61 +857,57 @@ def get_stock_pool(pool_name=None, page=0, page_size=None):
 def save_stock_data_to_db(df, frequency='d'):
     """保存股票数据到数据库"""
     try:
-        with get_db_connection() as conn:
-            # 根据频率选择表和字段
-            if frequency == 'd':
-                table_name = 'stock_daily_history'
-                date_col = 'trade_date'
-                # 日线表有 turnover_ratio 字段
-                columns = f'ts_code, {date_col}, open, high, low, close, volume, amount, turnover_ratio'
-                placeholders = '?, ?, ?, ?, ?, ?, ?, ?, ?'
-            else:
-                table_name = 'stock_minute_history'
-                date_col = 'timestamp'
-                # 分钟线表没有 turnover_ratio 字段
-                columns = f'ts_code, {date_col}, frequency, open, high, low, close, volume, amount'
-                placeholders = '?, ?, ?, ?, ?, ?, ?, ?, ?'
-
-            # 重命名列
-            df = df.rename(columns={'date': 'trade_date'})
-
-            # 保存数据
-            for _, row in df.iterrows():
-                if frequency == 'd':
-                    # 日线数据包含 turnover_ratio
-                    values = (
-                        row['code'],
-                        row['trade_date'],
-                        row['open'],
-                        row['high'],
-                        row['low'],
-                        row['close'],
-                        row['volume'],
-                        row['amount'],
-                        row['turn'] if 'turn' in row else None
-                    )
-                else:
-                    # 分钟线数据不包含 turnover_ratio
-                    values = (
-                        row['code'],
-                        row['trade_date'],
-                        frequency,
-                        row['open'],
-                        row['high'],
-                        row['low'],
-                        row['close'],
-                        row['volume'],
-                        row['amount']
-                    )
-
-                conn.execute(f"""
-                    INSERT OR REPLACE INTO {table_name}
-                    ({columns})
-                    VALUES ({placeholders})
-                """, values)
-
-            conn.commit()
-            return True
+        # 根据频率选择表和字段
+        if frequency == 'd':
+            table_name = 'stock_daily_history'
+            date_col = 'trade_date'
+            # 日线表有 turnover_ratio 字段
+            columns = f'ts_code, {date_col}, open, high, low, close, volume, amount, turnover_ratio'
+            placeholders = '?, ?, ?, ?, ?, ?, ?, ?, ?'
+        else:
+            table_name = 'stock_minute_history'
+            date_col = 'timestamp'
+            # 分钟线表没有 turnover_ratio 字段
+            columns = f'ts_code, {date_col}, frequency, open, high, low, close, volume, amount'
+            placeholders = '?, ?, ?, ?, ?, ?, ?, ?, ?'
+
+        # 重命名列
+        df = df.rename(columns={'date': 'trade_date'})
+
+        # 日期缺失（NaT）的行格式化后为 None，会让整批 executemany 因 NOT NULL 约束失败，先剔除
+        missing_date = df['trade_date'].isna()
+        if missing_date.any():
+            st.warning(f"⚠️ 跳过 {int(missing_date.sum())} 条日期缺失的记录")
+            df = df[~missing_date]
+            if df.empty:
+                return True
+
+        # 下载结果的日期列为 datetime64，写入前按表中的文本格式统一格式化
+        if pd.api.types.is_datetime64_any_dtype(df['trade_date']):
+            date_format = '%Y-%m-%d' if frequency == 'd' else '%Y-%m-%d %H:%M:%S'
+            df['trade_date'] = df['trade_date'].dt.strftime(date_format)
+
+        # 按表字段顺序选出各列，itertuples 直接产出原生类型的元组交给 executemany，
+        # 不再为每一行构建一个 Series
+        if frequency == 'd':
+            # 日线数据包含 turnover_ratio
+            if 'turn' not in df.columns:
+                df = df.assign(turn=None)
+            rows = df[['code', 'trade_date', 'open', 'high', 'low', 'close', 'volume', 'amount', 'turn']]
+        else:
+            # 分钟线数据不包含 turnover_ratio
+            rows = df.assign(frequency=frequency)[
+                ['code', 'trade_date', 'frequency', 'open', 'high', 'low', 'close', 'volume', 'amount']
+            ]
+
+        # 数据整理完后再交给写连接，整批在一个事务中写入
+        with get_db_transaction(row_factory=False) as (conn, cursor):
+            cursor.executemany(f"""
+                INSERT OR REPLACE INTO {table_name}
+                ({columns})
+                VALUES ({placeholders})
+            """, rows.itertuples(index=False, name=None))
+        return True
 
     except Exception as e:
         st.error(f"保存数据失败: {e}")
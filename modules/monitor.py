@@ -15,7 +15,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import config
-from utils.db_helper import execute_query, execute_insert, get_db_connection
+from utils.db_helper import (
+    execute_query, execute_insert, execute_update, execute_delete, execute_write, get_db_connection
+)
 
 
 def render():
@@ -205,11 +207,11 @@ def render_monitor_list():
         st.metric("总任务数", len(monitors))
 
     with col2:
-        active_count = len(monitors[monitors['is_active'] == 1])
+        active_count = int(monitors['is_active'].sum())
         st.metric("运行中", active_count)
 
     with col3:
-        total_triggered = monitors['triggered_count'].sum()
+        total_triggered = int(monitors['triggered_count'].sum())
         st.metric("累计触发", total_triggered)
 
     with col4:
@@ -227,82 +229,96 @@ def render_monitor_list():
         if auto_refresh:
             refresh_interval = st.number_input("刷新间隔（秒）", min_value=5, max_value=60, value=10)
 
-    # 显示监控任务
-    for _, monitor in monitors.iterrows():
-        with st.expander(f"🔔 {monitor['task_name']} - {monitor['stock_code']}", expanded=False):
-            # 任务信息
-            col1, col2, col3, col4 = st.columns(4)
+    # 显示监控任务（每张卡片是独立的fragment，卡片内的操作只重跑该卡片）
+    for monitor in monitors.to_dict('records'):
+        _render_monitor_card(monitor)
 
-            with col1:
-                status_color = "🟢" if monitor['is_active'] else "🔴"
-                status_text = "运行中" if monitor['is_active'] else "已停止"
-                st.markdown(f"**状态**: {status_color} {status_text}")
+    # 自动刷新
+    if auto_refresh:
+        time.sleep(refresh_interval)
+        st.rerun()
 
-            with col2:
-                st.markdown(f"**条件**: {monitor['condition_type']}")
 
-            with col3:
-                if monitor['condition_value']:
-                    st.markdown(f"**阈值**: {monitor['condition_value']}")
-                else:
-                    st.markdown(f"**阈值**: -")
+@st.fragment
+def _render_monitor_card(monitor):
+    """
+    渲染单个监控任务卡片
 
-            with col4:
-                st.markdown(f"**触发次数**: {monitor['triggered_count']}")
+    参数:
+        monitor: 监控任务字典
+    """
+    with st.expander(f"🔔 {monitor['task_name']} - {monitor['stock_code']}", expanded=False):
+        # 任务信息
+        col1, col2, col3, col4 = st.columns(4)
 
-            # 最后检查时间
-            if monitor['last_check_time']:
-                last_check = pd.to_datetime(monitor['last_check_time'])
-                time_diff = datetime.now() - last_check
-                st.caption(f"最后检查: {time_diff.seconds // 60} 分钟前")
+        with col1:
+            status_color = "🟢" if monitor['is_active'] else "🔴"
+            status_text = "运行中" if monitor['is_active'] else "已停止"
+            st.markdown(f"**状态**: {status_color} {status_text}")
 
-            # 实时状态
-            if monitor['is_active']:
-                with st.spinner("检查中..."):
-                    status = check_monitor_status(monitor)
+        with col2:
+            st.markdown(f"**条件**: {monitor['condition_type']}")
 
-                    if status:
-                        st.success(f"✅ {status['message']}")
-                    else:
-                        st.warning(status['message'] if isinstance(status, dict) else "检查中...")
+        with col3:
+            if monitor['condition_value']:
+                st.markdown(f"**阈值**: {monitor['condition_value']}")
+            else:
+                st.markdown(f"**阈值**: -")
 
-            # 操作按钮
-            col1, col2, col3, col4 = st.columns(4)
+        with col4:
+            st.markdown(f"**触发次数**: {monitor['triggered_count']}")
 
-            with col1:
-                new_status = not monitor['is_active']
-                action = "停止" if new_status else "启动"
-                if st.button(f"{action}", key=f"toggle_monitor_{monitor['id']}", use_container_width=True):
-                    toggle_monitor_status(monitor['id'], new_status)
-                    st.rerun()
+        # 最后检查时间
+        if monitor['last_check_time']:
+            last_check = pd.to_datetime(monitor['last_check_time'])
+            time_diff = datetime.now() - last_check
+            st.caption(f"最后检查: {time_diff.seconds // 60} 分钟前")
 
-            with col2:
-                if st.button("🔄 立即检查", key=f"check_{monitor['id']}", use_container_width=True):
-                    result = check_monitor_task(monitor)
-                    if result['triggered']:
-                        st.success(f"🔔 {result['message']}")
-                    else:
-                        st.info(f"ℹ️ {result['message']}")
-
-            with col3:
-                if st.button("📝 编辑", key=f"edit_monitor_{monitor['id']}", use_container_width=True):
-                    st.session_state[f"edit_monitor_{monitor['id']}"] = True
-                    st.rerun()
+        # 实时状态
+        if monitor['is_active']:
+            with st.spinner("检查中..."):
+                status = check_monitor_status(monitor)
 
-            with col4:
-                if st.button("🗑️ 删除", key=f"delete_monitor_{monitor['id']}", type="secondary", use_container_width=True):
-                    if st.session_state.get(f'confirm_delete_monitor_{monitor["id"]}', False):
-                        delete_monitor_task(monitor['id'])
-                        st.success("✅ 已删除")
-                        st.rerun()
-                    else:
-                        st.session_state[f'confirm_delete_monitor_{monitor["id"]}'] = True
-                        st.warning("⚠️ 再次点击确认删除")
+                if status:
+                    st.success(f"✅ {status['message']}")
+                else:
+                    st.warning(status['message'] if isinstance(status, dict) else "检查中...")
 
-    # 自动刷新
-    if auto_refresh:
-        time.sleep(refresh_interval)
-        st.rerun()
+        # 操作按钮
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            new_status = not monitor['is_active']
+            action = "停止" if new_status else "启动"
+            if st.button(f"{action}", key=f"toggle_monitor_{monitor['id']}", use_container_width=True):
+                toggle_monitor_status(monitor['id'], new_status)
+                st.rerun()
+
+        with col2:
+            if st.button("🔄 立即检查", key=f"check_{monitor['id']}", use_container_width=True):
+                result = check_monitor_task(monitor)
+                if result['triggered']:
+                    st.success(f"🔔 {result['message']}")
+                else:
+                    st.info(f"ℹ️ {result['message']}")
+
+        with col3:
+            if st.button("📝 编辑", key=f"edit_monitor_{monitor['id']}", use_container_width=True):
+                st.session_state[f"edit_monitor_{monitor['id']}"] = True
+                st.rerun()
+
+        with col4:
+            if st.button("🗑️ 删除", key=f"delete_monitor_{monitor['id']}", type="secondary", use_container_width=True):
+                # 待确认删除的任务ID统一存放在一个集合中，而不是每个任务一个键
+                pending_deletes = st.session_state.setdefault('pending_monitor_deletes', set())
+                if monitor['id'] in pending_deletes:
+                    delete_monitor_task(monitor['id'])
+                    pending_deletes.discard(monitor['id'])
+                    st.success("✅ 已删除")
+                    st.rerun()
+                else:
+                    pending_deletes.add(monitor['id'])
+                    st.warning("⚠️ 再次点击确认删除")
 
 
 # ============ 提醒历史 ============
@@ -327,14 +343,14 @@ def render_alert_history():
         st.metric("总提醒数", total_alerts)
 
     with col2:
-        unread_count = len(alerts[alerts['is_read'] == 0])
+        unread_count = total_alerts - int(alerts['is_read'].sum())
         st.metric("未读", unread_count)
 
     with col3:
         # 统计今日提醒
         today = datetime.now().date()
-        today_alerts = alerts[pd.to_datetime(alerts['triggered_at']).dt.date == today]
-        st.metric("今日提醒", len(today_alerts))
+        today_count = int((pd.to_datetime(alerts['triggered_at']).dt.date == today).sum())
+        st.metric("今日提醒", today_count)
 
     st.markdown("---")
 
@@ -438,15 +454,9 @@ def get_monitor_tasks(active_only=True):
 
         sql += " ORDER BY created_at DESC"
 
-        results = execute_query(sql, fetch_all=True)
-
-        if results:
-            columns = [
-                'id', 'task_name', 'stock_code', 'condition_type', 'condition_value',
-                'condition_json', 'is_active', 'last_check_time', 'triggered_count', 'created_at'
-            ]
-            return pd.DataFrame(results, columns=columns)
-        return pd.DataFrame()
+        # 列名直接取自游标描述，由 pandas 一次性构建 DataFrame
+        with get_db_connection() as conn:
+            return pd.read_sql_query(sql, conn)
 
     except Exception as e:
         st.error(f"获取任务失败: {e}")
@@ -567,10 +577,7 @@ def check_monitor_task(monitor):
 def toggle_monitor_status(task_id, new_status):
     """切换监控任务状态"""
     try:
-        sql = "UPDATE monitor_tasks SET is_active = ? WHERE id = ?"
-        with get_db_connection() as conn:
-            conn.execute(sql, [new_status, task_id])
-            conn.commit()
+        execute_update('monitor_tasks', {'is_active': new_status}, 'id = ?', [task_id])
         return True
 
     except Exception as e:
@@ -581,10 +588,7 @@ def toggle_monitor_status(task_id, new_status):
 def delete_monitor_task(task_id):
     """删除监控任务"""
     try:
-        sql = "DELETE FROM monitor_tasks WHERE id = ?"
-        with get_db_connection() as conn:
-            conn.execute(sql, [task_id])
-            conn.commit()
+        execute_delete('monitor_tasks', 'id = ?', [task_id])
         return True
 
     except Exception as e:
@@ -614,9 +618,7 @@ def update_trigger_count(task_id):
     """更新触发次数"""
     try:
         sql = "UPDATE monitor_tasks SET triggered_count = triggered_count + 1, last_check_time = ? WHERE id = ?"
-        with get_db_connection() as conn:
-            conn.execute(sql, [datetime.now(), task_id])
-            conn.commit()
+        execute_write(lambda cursor: cursor.execute(sql, [datetime.now(), task_id]))
         return True
 
     except Exception as e:
@@ -634,15 +636,8 @@ def get_alert_history(limit=100):
             LIMIT ?
         """
 
-        results = execute_query(sql, [limit], fetch_all=True)
-
-        if results:
-            columns = [
-                'id', 'task_id', 'stock_code', 'triggered_at', 'trigger_message',
-                'current_value', 'is_read', 'task_name'
-            ]
-            return pd.DataFrame(results, columns=columns)
-        return pd.DataFrame()
+        with get_db_connection() as conn:
+            return pd.read_sql_query(sql, conn, params=[limit])
 
     except Exception as e:
         st.error(f"获取历史失败: {e}")
@@ -652,10 +647,7 @@ def get_alert_history(limit=100):
 def mark_alert_read(alert_id):
     """标记提醒为已读"""
     try:
-        sql = "UPDATE monitor_alerts SET is_read = 1 WHERE id = ?"
-        with get_db_connection() as conn:
-            conn.execute(sql, [alert_id])
-            conn.commit()
+        execute_update('monitor_alerts', {'is_read': 1}, 'id = ?', [alert_id])
         return True
 
     except Exception as e:
@@ -665,10 +657,7 @@ def mark_alert_read(alert_id):
 def mark_all_alerts_read():
     """标记所有提醒为已读"""
     try:
-        sql = "UPDATE monitor_alerts SET is_read = 1 WHERE is_read = 0"
-        with get_db_connection() as conn:
-            conn.execute(sql)
-            conn.commit()
+        execute_update('monitor_alerts', {'is_read': 1}, 'is_read = 0')
         return True
 
     except Exception as e:
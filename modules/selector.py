@@ -16,7 +16,17 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import config
-from utils.db_helper import execute_query, get_db_connection, execute_insert
+from utils.db_helper import execute_query, get_db_connection, execute_insert, execute_delete
+
+# 旧版策略模板文件
+STRATEGY_TEMPLATES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'templates',
+    'strategy_templates.json'
+)
+
+# 模板文件中的元数据键（不是策略分类）
+TEMPLATE_METADATA_KEYS = frozenset({'策略版本', '更新日期'})
 
 
 def render():
@@ -50,7 +60,7 @@ def render_selection_execute():
     # 获取用户策略
     strategies = get_user_strategies()
 
-    if strategies is None or len(strategies) == 0:
+    if not strategies:
         st.warning("⚠️ 你还没有保存任何策略，请先在「策略配置」中创建策略")
         return
 
@@ -67,10 +77,10 @@ def render_selection_execute():
 
     with col1:
         # 选择策略
-        strategy_options = strategies['strategy_name'].tolist()
+        strategies_by_name = {strategy['strategy_name']: strategy for strategy in strategies}
         selected_strategy = st.selectbox(
             "选择策略",
-            options=strategy_options,
+            options=list(strategies_by_name),
             help="选择要执行的策略"
         )
 
@@ -94,7 +104,7 @@ def render_selection_execute():
     st.markdown("---")
 
     # 显示策略信息
-    strategy_info = strategies[strategies['strategy_name'] == selected_strategy].iloc[0]
+    strategy_info = strategies_by_name[selected_strategy]
 
     col1, col2, col3 = st.columns(3)
 
@@ -127,7 +137,8 @@ def render_selection_execute():
                 template_name = strategy_info['template_name']
 
                 # 检查是否是新格式（V2版本）
-                if template_name == 'template_v2' or 'strategy_id' in params:
+                is_new_format = template_name == 'template_v2' or 'strategy_id' in params
+                if is_new_format:
                     # 使用新版本预览
                     st.markdown("**新格式策略预览**:")
 
@@ -139,19 +150,19 @@ def render_selection_execute():
                     st.markdown("**选择的条件**:")
 
                     selected_conditions = params.get('selected_conditions', [])
-                    if selected_conditions:
-                        for cond_id in selected_conditions:
-                            st.markdown(f"- {cond_id}")
+                    condition_params = params.get('params', {})
+                    preview_md = format_params_markdown(strategy_info['params_json'], is_new_format)
+
+                    if preview_md['conditions']:
+                        st.markdown(preview_md['conditions'])
                     else:
                         st.info("未选择任何条件")
 
                     st.markdown("---")
                     st.markdown("**参数配置**:")
 
-                    condition_params = params.get('params', {})
-                    if condition_params:
-                        for param_name, param_value in condition_params.items():
-                            st.markdown(f"- **{param_name}**: {param_value}")
+                    if preview_md['params']:
+                        st.markdown(preview_md['params'])
                     else:
                         st.info("无参数配置")
 
@@ -180,9 +191,7 @@ def render_selection_execute():
                 else:
                     # 使用旧版本预览
                     st.markdown("**参数配置**:")
-
-                    for param_name, param_value in params.items():
-                        st.markdown(f"- **{param_name}**: {param_value}")
+                    st.markdown(format_params_markdown(strategy_info['params_json'], is_new_format)['params'])
 
                     st.markdown("---")
 
@@ -347,23 +356,23 @@ def render_selection_history():
     st.markdown("---")
 
     # 历史列表
-    for _, record in history.iterrows():
-        with st.expander(f"📅 {record['execute_date']} - {record['strategy_name']} ({record['result_count']}只)", expanded=False):
+    for record in history.itertuples(index=False):
+        with st.expander(f"📅 {record.execute_date} - {record.strategy_name} ({record.result_count}只)", expanded=False):
             col1, col2, col3 = st.columns(3)
 
             with col1:
-                st.markdown(f"**股票池**: {record['stock_pool']}")
+                st.markdown(f"**股票池**: {record.stock_pool}")
 
             with col2:
-                st.markdown(f"**执行耗时**: {record['execution_time']:.2f}秒")
+                st.markdown(f"**执行耗时**: {record.execution_time:.2f}秒")
 
             with col3:
-                st.markdown(f"**执行时间**: {record['created_at']}")
+                st.markdown(f"**执行时间**: {record.created_at}")
 
             # 查看详情按钮
-            if st.button(f"查看详情", key=f"view_{record['id']}"):
+            if st.button(f"查看详情", key=f"view_{record.id}"):
                 try:
-                    results = json.loads(record['results_json'])
+                    results = json.loads(record.results_json)
                     df = pd.DataFrame(results)
 
                     st.dataframe(df, use_container_width=True)
@@ -371,9 +380,9 @@ def render_selection_history():
                     # 导出按钮
                     csv = df.to_csv(index=False).encode('utf-8')
                     st.download_button(
-                        f"📥 导出_{record['id']}",
+                        f"📥 导出_{record.id}",
                         csv,
-                        f"selection_{record['id']}.csv",
+                        f"selection_{record.id}.csv",
                         "text/csv"
                     )
 
@@ -381,8 +390,8 @@ def render_selection_history():
                     st.error(f"加载详情失败: {e}")
 
             # 删除按钮
-            if st.button(f"🗑️ 删除", key=f"delete_{record['id']}", type="secondary"):
-                delete_selection_history(record['id'])
+            if st.button(f"🗑️ 删除", key=f"delete_{record.id}", type="secondary"):
+                delete_selection_history(record.id)
                 st.success("✅ 已删除")
                 st.rerun()
 
@@ -461,11 +470,16 @@ def render_result_comparison():
         st.markdown("#### 🏆 多次被选中的股票")
 
         if len(stock_counts) > 0:
-            top_stocks = stock_counts.head(10)
+            top_stocks = stock_counts.head(10).rename('被选中次数').to_frame()
+            stock_names = combined.drop_duplicates('ts_code').set_index('ts_code')['stock_name']
+            top_stocks.insert(0, 'stock_name', stock_names.reindex(top_stocks.index))
 
-            for stock, count in top_stocks.items():
-                stock_name = combined[combined['ts_code'] == stock]['stock_name'].iloc[0]
-                st.metric(f"{stock} - {stock_name}", f"被选中 {count} 次")
+            # 一次性渲染表格，避免逐只股票调用 st.metric
+            st.dataframe(
+                top_stocks.rename_axis('ts_code'),
+                use_container_width=True,
+                hide_index=False
+            )
 
         # 详细数据表
         st.markdown("#### 📋 详细对比表")
@@ -478,8 +492,40 @@ def render_result_comparison():
 
 # ============ 辅助函数 ============
 
+@st.cache_data(show_spinner=False)
+def format_params_markdown(params_json, is_new_format):
+    """
+    将策略参数JSON渲染为Markdown列表（按原始JSON字符串和格式缓存）
+
+    参数:
+        params_json: 策略的 params_json 字符串
+        is_new_format: 是否为新格式（V2）策略，由调用方按 template_name 和 strategy_id 判断
+
+    返回:
+        {'conditions': 条件列表Markdown, 'params': 参数列表Markdown}
+        新格式策略取 selected_conditions 和 params，旧格式把所有键作为参数
+    """
+    params = json.loads(params_json)
+
+    if is_new_format:
+        conditions = params.get('selected_conditions', [])
+        params = params.get('params', {})
+    else:
+        conditions = []
+
+    return {
+        'conditions': "\n".join(f"- {cond_id}" for cond_id in conditions),
+        'params': "\n".join(f"- **{name}**: {value}" for name, value in params.items())
+    }
+
+
 def get_user_strategies():
-    """获取用户策略"""
+    """
+    获取用户策略
+
+    返回:
+        策略字典列表（按创建时间倒序）
+    """
     try:
         sql = """
             SELECT id, strategy_name, strategy_type, template_name,
@@ -490,15 +536,11 @@ def get_user_strategies():
         """
 
         results = execute_query(sql, fetch_all=True)
-
-        if results:
-            columns = ['id', 'strategy_name', 'strategy_type', 'template_name', 'params_json', 'description']
-            return pd.DataFrame(results, columns=columns)
-        return pd.DataFrame()
+        return [dict(row) for row in results]
 
     except Exception as e:
         st.error(f"获取策略失败: {e}")
-        return pd.DataFrame()
+        return []
 
 
 def execute_strategy(strategy, stock_list, date):
@@ -529,65 +571,128 @@ def execute_strategy(strategy, stock_list, date):
         return None
 
 
-def generate_strategy_sql(strategy, params, stock_list=None, date=None):
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_strategy_templates(mtime=None):
     """
-    生成策略SQL查询
+    加载策略模板文件（带缓存）
 
     参数:
-        strategy: 策略信息字典，必须包含 'template_name' 键
-        params: 参数字典（参数名到参数值的映射）
-        stock_list: 可选，股票代码列表
-        date: 可选，交易日期
+        mtime: 模板文件修改时间，仅作为缓存键使用
 
     返回:
-        tuple: (sql_query, param_list)
-            - sql_query: 完整的SQL查询语句
-            - param_list: 参数值列表（用于SQL的?占位符）
+        模板字典
     """
-    from utils.sql_builder import SQLBuilder
-    from utils.field_mapper import get_all_direct_fields
-    import os
-    import json
+    with open(STRATEGY_TEMPLATES_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-    # 1. 加载策略模板
-    template_name = strategy.get('template_name', '')
-    if not template_name:
-        raise ValueError("策略信息中缺少 'template_name' 字段")
 
-    template_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        'templates',
-        'strategy_templates.json'
-    )
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_template_index(mtime=None):
+    """
+    构建 模板名称 -> 模板 的索引（带缓存）
+
+    参数:
+        mtime: 模板文件修改时间，仅作为缓存键使用
+
+    返回:
+        {模板名称: 模板字典}
+    """
+    templates = load_strategy_templates(mtime)
+
+    # 按文件中的顺序遍历，模板名称重复时保留最先出现的一个
+    index = {}
+    for strategy_type, strategies in templates.items():
+        if strategy_type in TEMPLATE_METADATA_KEYS or not isinstance(strategies, dict):
+            continue
+        for name, template in strategies.items():
+            index.setdefault(name, template)
+
+    return index
+
+
+def get_strategy_template(template_name, mtime=None):
+    """
+    按模板名称查找策略模板
+
+    参数:
+        template_name: 模板名称
+        mtime: 模板文件修改时间，仅作为缓存键使用
+
+    返回:
+        模板字典，未找到时返回None
+    """
+    return get_template_index(mtime).get(template_name)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_template_condition(template_name, params_items, mtime=None):
+    """
+    根据旧版策略模板构建WHERE条件（带缓存，相同模板和参数直接返回缓存结果）
+
+    参数:
+        template_name: 模板名称
+        params_items: 排序后的 (参数名, 参数值) 元组
+        mtime: 模板文件修改时间，仅作为缓存键使用
+
+    返回:
+        (where_clause, condition_params, required_fields)
+    """
+    from utils.sql_builder import SQLBuilder
 
     try:
-        with open(template_path, 'r', encoding='utf-8') as f:
-            templates = json.load(f)
+        template = get_strategy_template(template_name, mtime)
     except Exception as e:
         raise ValueError(f"加载策略模板失败: {e}")
 
-    # 2. 查找匹配的模板
-    template = None
-    for strategy_type in templates.values():
-        if isinstance(strategy_type, dict) and template_name in strategy_type:
-            template = strategy_type[template_name]
-            break
-
     if not template:
         raise ValueError(f"未找到策略模板: {template_name}")
 
-    # 3. 获取SQL条件模板
+    # 获取SQL条件模板
     sql_condition_template = template.get('SQL条件', '')
     if not sql_condition_template:
         raise ValueError(f"策略 '{template_name}' 没有定义SQL条件")
 
-    # 4. 使用SQLBuilder构建WHERE条件
+    # 使用SQLBuilder构建WHERE条件，并获取需要的字段
+    params = dict(params_items)
     builder = SQLBuilder()
     where_clause, condition_params = builder.build_condition(sql_condition_template, params)
-
-    # 5. 获取需要的字段
     required_fields = builder.get_required_fields(sql_condition_template, params)
 
+    return where_clause, condition_params, required_fields
+
+
+def generate_strategy_sql(strategy, params, stock_list=None, date=None):
+    """
+    生成策略SQL查询
+
+    参数:
+        strategy: 策略信息字典，必须包含 'template_name' 键
+        params: 参数字典（参数名到参数值的映射）
+        stock_list: 可选，股票代码列表
+        date: 可选，交易日期
+
+    返回:
+        tuple: (sql_query, param_list)
+            - sql_query: 完整的SQL查询语句
+            - param_list: 参数值列表（用于SQL的?占位符）
+    """
+    # 1. 加载策略模板
+    template_name = strategy.get('template_name', '')
+    if not template_name:
+        raise ValueError("策略信息中缺少 'template_name' 字段")
+
+    # 2-5. 查找模板并构建WHERE条件（按模板名和参数缓存）
+    try:
+        mtime = os.path.getmtime(STRATEGY_TEMPLATES_PATH)
+    except OSError as e:
+        raise ValueError(f"加载策略模板失败: {e}")
+
+    where_clause, condition_params, required_fields = build_template_condition(
+        template_name,
+        tuple(sorted(params.items())),
+        mtime
+    )
+
     # 6. 构建基础查询
     # 基础字段（始终包含）
     base_fields = ['h.ts_code', 'p.stock_name', 'h.close', 'h.volume', 'i.change_pct']
@@ -701,10 +806,7 @@ def get_selection_history(limit=100):
 def delete_selection_history(record_id):
     """删除历史记录"""
     try:
-        sql = "DELETE FROM selection_history WHERE id = ?"
-        with get_db_connection() as conn:
-            conn.execute(sql, [record_id])
-            conn.commit()
+        execute_delete('selection_history', 'id = ?', [record_id])
         return True
 
     except Exception as e:
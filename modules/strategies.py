@@ -6,14 +6,81 @@
 
 import streamlit as st
 import json
+import sqlite3
 import pandas as pd
 import sys
 import os
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
 
 # 添加父目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.db_helper import execute_query, execute_insert, get_db_connection
+from utils.db_helper import get_db_transaction
+from utils.db_pool import get_pooled_connection
+from utils.strategy_template_engine import StrategyTemplateEngine
+
+# 风险等级对应的标识
+RISK_COLORS = {"低": "🟢", "中": "🟡", "高": "🟠", "极高": "🔴"}
+RISK_MARKDOWN = {level: f"{color} {level}" for level, color in RISK_COLORS.items()}
+
+# 数值型参数及其默认步长
+NUMERIC_PARAM_STEPS = {'int': 1, 'float': 0.01}
+
+# 我的策略页面使用的 session_state 键
+STRATEGY_EDITOR_KEY = "my_strategies_editor"
+PENDING_DELETE_KEY = "pending_delete_ids"
+
+# ============ SQL语句 ============
+# 固定的SQL文本可命中 sqlite3 连接上的预编译语句缓存
+
+# params_json 可能以 orjson 的 UTF-8 字节绑定，由 SQLite 转为 TEXT 存储
+INSERT_STRATEGY_SQL = """
+    INSERT INTO user_strategies
+        (user_id, strategy_name, strategy_type, template_name, params_json, description)
+    VALUES
+        (:user_id, :strategy_name, :strategy_type, :template_name, CAST(:params_json AS TEXT), :description)
+"""
+
+STRATEGY_EXISTS_SQL = "SELECT 1 FROM user_strategies WHERE user_id = ? AND strategy_name = ? LIMIT 1"
+
+STRATEGY_NAME_INDEX_SQL = "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_user_strategy_name'"
+
+STRATEGY_ID_EXISTS_SQL = "SELECT 1 FROM user_strategies WHERE id = ? LIMIT 1"
+
+LIST_STRATEGIES_SQL = """
+    SELECT id, strategy_name, strategy_type, template_name,
+           params_json, description, is_active, created_at
+    FROM user_strategies
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+"""
+
+STRATEGY_STATS_SQL = """
+    SELECT COUNT(*) AS total,
+           COUNT(DISTINCT strategy_type) AS type_count,
+           COALESCE(SUM(is_active = 1), 0) AS active_count
+    FROM user_strategies
+    WHERE user_id = ?
+"""
+
+# 在数据库内一次完成读取原策略和插入副本
+COPY_STRATEGY_SQL = """
+    INSERT INTO user_strategies
+        (user_id, strategy_name, strategy_type, template_name, params_json, description)
+    SELECT user_id, strategy_name || '_副本', strategy_type, template_name,
+           params_json, '复制自: ' || strategy_name
+    FROM user_strategies
+    WHERE id = ?
+"""
+
+SET_STATUS_SQL = "UPDATE user_strategies SET is_active = ? WHERE id = ?"
+
+DELETE_STRATEGY_SQL = "DELETE FROM user_strategies WHERE id = ?"
 
 
 def render():
@@ -31,6 +98,7 @@ def render():
         "📋 策略说明"
     ])
 
+    # 各个查询按需从连接池借用连接、用完即还，渲染期间不长期占用连接
     with tab1:
         render_strategy_config_v2()
 
@@ -54,14 +122,15 @@ def render_strategy_config_v2():
     """
     st.subheader("策略配置器")
 
-    try:
-        from utils.strategy_template_engine import StrategyTemplateEngine
-
-        # 初始化引擎
-        engine = StrategyTemplateEngine()
+    # 编辑中的策略可能已被删除：按主键检查一行，失效时退出编辑状态
+    editing_id = st.session_state.get('editing_strategy_id')
+    if editing_id is not None and not check_strategy_id_exists(editing_id):
+        st.session_state.editing_strategy_id = None
 
-        # 获取所有策略分类
-        all_strategies = engine.get_all_strategies_ui_config()
+    try:
+        # 获取预先索引好的策略分类
+        strategy_index = get_strategy_index()
+        strategy_names = strategy_index['names']
 
         # 选择策略类型和具体策略
         col1, col2 = st.columns(2)
@@ -69,26 +138,23 @@ def render_strategy_config_v2():
         with col1:
             category = st.selectbox(
                 "策略类型",
-                options=list(all_strategies.keys()),
+                options=strategy_index['categories'],
                 help="选择策略类型",
                 key="v2_category"
             )
 
         with col2:
-            strategies_in_category = all_strategies[category]
-            strategy_options = [f"{s['name']} ({s['id']})" for s in strategies_in_category]
-            selected_display = st.selectbox(
+            # 选项直接使用 strategy_id，显示名称由 format_func 生成
+            strategy_id = st.selectbox(
                 "具体策略",
-                options=strategy_options,
+                options=strategy_index['ids'][category],
+                format_func=lambda sid: f"{strategy_names[sid]} ({sid})",
                 help="选择具体策略",
                 key="v2_strategy_select"
             )
 
-            # 从显示名称中提取 strategy_id
-            strategy_id = selected_display.split('(')[-1].rstrip(')')
-
         # 获取策略配置
-        strategy_config = engine.get_strategy_ui_config(strategy_id)
+        strategy_config = get_strategy_ui_config(strategy_id)
 
         # 显示策略信息
         st.markdown("---")
@@ -100,8 +166,8 @@ def render_strategy_config_v2():
             st.info(f"**适用场景**: {category}")
 
         with col2:
-            risk_colors = {"低": "🟢", "中": "🟡", "高": "🟠"}
-            st.markdown(f"**风险等级**: {risk_colors.get(strategy_config['risk_level'], '')} {strategy_config['risk_level']}")
+            risk_level = strategy_config['risk_level']
+            st.markdown(f"**风险等级**: {RISK_MARKDOWN.get(risk_level, risk_level)}")
 
         with col3:
             st.markdown(f"**组合逻辑**: {strategy_config['combine_logic']}")
@@ -116,44 +182,41 @@ def render_strategy_config_v2():
         selected_conditions = []
         condition_params = {}
 
+        # 每个条件只渲染复选框（必需标记并入标签），不再为每行创建容器和分栏
         for cond_config in strategy_config['conditions']:
-            with st.container():
-                col1, col2 = st.columns([4, 1])
-
-                with col1:
-                    # 条件选择复选框
-                    is_selected = st.checkbox(
-                        cond_config['label'],
-                        value=cond_config['enabled'],
-                        key=f"v2_cond_{cond_config['id']}",
-                        help=f"ID: {cond_config['id']}"
-                    )
-
-                    if is_selected:
-                        selected_conditions.append(cond_config['id'])
+            is_selected = st.checkbox(
+                cond_config['display_label'],
+                value=cond_config['enabled'],
+                key=cond_config['key'],
+                help=f"ID: {cond_config['id']}"
+            )
 
-                        # 显示参数配置
-                        if cond_config['params']:
-                            with st.expander("配置参数", expanded=False):
-                                for param_config in cond_config['params']:
-                                    value = render_param_input_v2(param_config)
-                                    condition_params[param_config['name']] = value
+            if is_selected:
+                selected_conditions.append(cond_config['id'])
 
-                with col2:
-                    if cond_config['required']:
-                        st.caption("⚠️ 必需")
+                # 显示参数配置
+                if cond_config['params']:
+                    with st.expander("配置参数", expanded=False):
+                        # 参数按奇偶分到两栏，单个循环完成渲染
+                        param_cols = st.columns(2)
+                        for i, param_config in enumerate(cond_config['params']):
+                            with param_cols[i % 2]:
+                                condition_params[param_config['name']] = render_param_input_v2(param_config)
 
         st.markdown("---")
 
-        # SQL预览
-        with st.expander("👁️ SQL预览", expanded=False):
-            user_config = {
-                'selected_conditions': selected_conditions,
-                'params': condition_params
-            }
+        # SQL预览（仅在打开时生成，折叠状态下的 rerun 不做任何SQL构建）
+        show_sql = st.toggle("👁️ SQL预览", value=False, key="v2_show_sql")
 
+        if show_sql and not selected_conditions:
+            st.caption("未选择条件，跳过SQL生成")
+        elif show_sql:
             try:
-                where_clause, params = engine.build_sql(strategy_id, user_config)
+                where_clause, params = build_strategy_sql(
+                    strategy_id,
+                    tuple(selected_conditions),
+                    tuple(sorted(condition_params.items()))
+                )
 
                 st.markdown("**WHERE条件:**")
                 st.code(f"WHERE {where_clause}", language="sql")
@@ -192,22 +255,17 @@ def render_strategy_config_v2():
         with col3:
             if st.button("💾 保存策略", type="primary", key="v2_save_button"):
                 if save_name:
-                    if check_strategy_exists_v2(save_name):
-                        st.warning(f"⚠️ 策略 '{save_name}' 已存在，请使用其他名称")
-                    else:
-                        # 保存新格式策略
-                        success = save_strategy_v2(
-                            save_name,
-                            strategy_id,
-                            selected_conditions,
-                            condition_params,
-                            save_description
-                        )
-
-                        if success:
-                            st.success(f"✅ 策略 '{save_name}' 已保存！")
-                        else:
-                            st.error("❌ 保存失败")
+                    # 保存新格式策略（重名由唯一索引拒绝，save_strategy_v2 负责提示）
+                    success = save_strategy_v2(
+                        save_name,
+                        strategy_id,
+                        selected_conditions,
+                        condition_params,
+                        save_description
+                    )
+
+                    if success:
+                        st.success(f"✅ 策略 '{save_name}' 已保存！")
                 else:
                     st.warning("⚠️ 请输入策略名称")
 
@@ -228,67 +286,47 @@ def render_param_input_v2(param_config):
             'default': 2.0,
             'min': 1.5,
             'max': 5.0,
-            'step': 0.1
+            'step': 0.1,
+            'key': 'v2_param_volume_ratio'
         }
 
     返回:
         参数值
     """
+    # 类型转换、默认步长和控件类型已在 get_strategy_ui_config 中预先处理
     param_type = param_config['type']
     label = param_config['label']
     default = param_config['default']
-    min_val = param_config.get('min')
-    max_val = param_config.get('max')
-    step = param_config.get('step')
-
-    # 为每个参数生成唯一的 key
-    param_key = f"v2_param_{param_config['name']}"
-
-    if param_type == 'int':
-        if min_val is not None and max_val is not None:
-            return st.slider(
-                label,
-                min_value=int(min_val),
-                max_value=int(max_val),
-                value=int(default),
-                step=int(step) if step else 1,
-                key=param_key
-            )
-        else:
-            return st.number_input(
-                label,
-                value=int(default),
-                key=param_key
-            )
+    param_key = param_config['key']
 
-    elif param_type == 'float':
-        if min_val is not None and max_val is not None:
+    if param_type in NUMERIC_PARAM_STEPS:
+        if param_config['use_slider']:
             return st.slider(
                 label,
-                min_value=float(min_val),
-                max_value=float(max_val),
-                value=float(default),
-                step=float(step) if step else 0.01,
+                min_value=param_config['min'],
+                max_value=param_config['max'],
+                value=default,
+                step=param_config['step'],
                 key=param_key
             )
         else:
             return st.number_input(
                 label,
-                value=float(default),
+                value=default,
                 key=param_key
             )
 
     elif param_type == 'bool':
         return st.checkbox(
             label,
-            value=bool(default),
+            value=default,
             key=param_key
         )
 
     else:
         return st.text_input(
             label,
-            value=str(default),
+            value=default,
             key=param_key
         )
 
@@ -313,28 +351,60 @@ def save_strategy_v2(name, strategy_id, selected_conditions, params, description
             'strategy_name': name,
             'strategy_type': strategy_id,  # 使用 strategy_id 作为类型
             'template_name': 'template_v2',  # 标记为新版本
-            'params_json': json.dumps({
+            'params_json': _dumps_json({
                 'strategy_id': strategy_id,
                 'selected_conditions': selected_conditions,
                 'params': params
-            }, ensure_ascii=False),
+            }),
             'description': description
         }
 
-        execute_insert('user_strategies', data)
+        with _transaction() as db:
+            # 唯一索引缺失时（旧库中已有重名数据）退回到先查询再插入
+            has_name_index = db.execute(STRATEGY_NAME_INDEX_SQL).fetchone() is not None
+            if not has_name_index and check_strategy_exists_v2(name, conn=db):
+                raise sqlite3.IntegrityError(f"策略名称重复: {name}")
+
+            db.execute(INSERT_STRATEGY_SQL, data)
+        # 清除缓存
+        _clear_strategy_cache()
         return True
 
+    except sqlite3.IntegrityError:
+        st.warning(f"⚠️ 策略 '{name}' 已存在，请使用其他名称")
+        return False
+
     except Exception as e:
         st.error(f"保存失败: {e}")
         return False
 
 
-def check_strategy_exists_v2(strategy_name):
+def check_strategy_exists_v2(strategy_name, user_id='default', conn=None):
     """检查策略是否已存在（V2版本）"""
     try:
-        sql = "SELECT COUNT(*) as count FROM user_strategies WHERE strategy_name = ?"
-        result = execute_query(sql, [strategy_name], fetch_one=True)
-        return result['count'] > 0 if result else False
+        with _connection(conn) as db:
+            result = db.execute(STRATEGY_EXISTS_SQL, [user_id, strategy_name]).fetchone()
+        return result is not None
+
+    except Exception as e:
+        return False
+
+
+def check_strategy_id_exists(strategy_id, conn=None):
+    """
+    按ID检查策略是否存在（只读取一行）
+
+    参数:
+        strategy_id: 策略ID
+        conn: 可选的数据库连接，传入时复用该连接
+
+    返回:
+        bool: 是否存在
+    """
+    try:
+        with _connection(conn) as db:
+            result = db.execute(STRATEGY_ID_EXISTS_SQL, [int(strategy_id)]).fetchone()
+        return result is not None
 
     except Exception as e:
         return False
@@ -347,91 +417,111 @@ def render_my_strategies():
 
     st.subheader("我的策略")
 
+    state = st.session_state
+
     # 获取用户策略
     strategies = get_user_strategies()
 
-    if strategies is None or len(strategies) == 0:
+    if not strategies:
         st.info("📭 你还没有保存任何策略，去配置一个吧！")
         return
 
-    # 策略统计
+    # 策略统计（由SQL聚合得到）
+    stats = get_strategy_stats()
+
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        st.metric("策略总数", len(strategies))
+        st.metric("策略总数", stats['total'])
 
     with col2:
-        type_counts = strategies['strategy_type'].value_counts()
-        st.metric("策略类型", len(type_counts))
+        st.metric("策略类型", stats['type_count'])
 
     with col3:
-        active_count = len(strategies[strategies['is_active'] == 1])
-        st.metric("启用中", active_count)
+        st.metric("启用中", stats['active_count'])
 
     st.markdown("---")
 
     # 策略列表
     st.markdown("### 📋 策略列表")
 
-    for _, strategy in strategies.iterrows():
-        with st.expander(f"📌 {strategy['strategy_name']}", expanded=False):
-            # 策略信息
-            col1, col2, col3 = st.columns(3)
-
-            with col1:
-                st.markdown(f"**类型**: {strategy['strategy_type']}")
-
-            with col2:
-                st.markdown(f"**模板**: {strategy['template_name']}")
-
-            with col3:
-                status = "✅ 启用" if strategy['is_active'] else "❌ 禁用"
-                st.markdown(f"**状态**: {status}")
-
-            if strategy['description']:
-                st.markdown(f"**说明**: {strategy['description']}")
-
-            st.markdown("---")
-
-            # 操作按钮
-            col1, col2, col3, col4 = st.columns(4)
-
-            with col1:
-                if st.button(f"✏️ 编辑", key=f"edit_{strategy['id']}"):
-                    st.session_state.editing_strategy_id = strategy['id']
-                    st.rerun()
-
-            with col2:
-                new_status = not strategy['is_active']
-                status_text = "禁用" if strategy['is_active'] else "启用"
-                if st.button(f"{status_text}", key=f"toggle_{strategy['id']}"):
-                    toggle_strategy_status(strategy['id'], new_status)
-                    st.rerun()
-
-            with col3:
-                if st.button(f"📋 复制", key=f"copy_{strategy['id']}"):
-                    if copy_strategy(strategy['id']):
-                        st.success("✅ 已复制")
-                        st.rerun()
-
-            with col4:
-                # 使用独立的标志键和按钮键
-                confirm_key = f'show_confirm_{strategy["id"]}'
-                if not st.session_state.get(confirm_key, False):
-                    if st.button(f"🗑️ 删除", key=f"delete_btn_{strategy['id']}"):
-                        st.session_state[confirm_key] = True
-                        st.rerun()
-                else:
-                    col_a, col_b = st.columns(2)
-                    with col_a:
-                        if st.button(f"⚠️ 确认", key=f"confirm_yes_{strategy['id']}", type="primary"):
-                            delete_strategy(strategy['id'])
-                            st.success("✅ 已删除")
-                            st.rerun()
-                    with col_b:
-                        if st.button(f"❌ 取消", key=f"confirm_no_{strategy['id']}"):
-                            st.session_state[confirm_key] = False
-                            st.rerun()
+    # 整表一次渲染，通过勾选列选择要操作的策略（仅在此处为表格控件构造DataFrame）
+    table = pd.DataFrame([
+        {
+            '选择': False,
+            '策略名称': s['strategy_name'],
+            '类型': s['strategy_type'],
+            '模板': s['template_name'],
+            '状态': "✅ 启用" if s['is_active'] else "❌ 禁用",
+            '说明': s['description'] or '',
+            '创建时间': s['created_at']
+        }
+        for s in strategies
+    ])
+
+    edited = st.data_editor(
+        table,
+        column_config={
+            '选择': st.column_config.CheckboxColumn("选择", help="勾选后使用下方按钮操作")
+        },
+        disabled=[col for col in table.columns if col != '选择'],
+        hide_index=True,
+        use_container_width=True,
+        key=STRATEGY_EDITOR_KEY
+    )
+
+    selected_ids = [
+        s['id'] for s, checked in zip(strategies, edited['选择'].tolist()) if checked
+    ]
+
+    # 操作按钮
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        if st.button("✏️ 编辑", key="edit_selected", disabled=len(selected_ids) != 1):
+            state.editing_strategy_id = selected_ids[0]
+            st.rerun()
+
+    with col2:
+        if st.button("✅ 启用", key="enable_selected", disabled=not selected_ids):
+            set_strategies_status(selected_ids, True)
+            _reset_strategy_selection()
+
+    with col3:
+        if st.button("❌ 禁用", key="disable_selected", disabled=not selected_ids):
+            set_strategies_status(selected_ids, False)
+            _reset_strategy_selection()
+
+    with col4:
+        if st.button("📋 复制", key="copy_selected", disabled=not selected_ids):
+            copy_strategies(selected_ids)
+            _reset_strategy_selection()
+
+    with col5:
+        if st.button("🗑️ 删除", key="delete_selected", disabled=not selected_ids):
+            state[PENDING_DELETE_KEY] = selected_ids
+            st.rerun()
+
+    # 删除确认
+    pending_ids = state.get(PENDING_DELETE_KEY)
+    if pending_ids:
+        st.warning(f"⚠️ 确认删除选中的 {len(pending_ids)} 个策略？")
+        col_a, col_b = st.columns(2)
+        with col_a:
+            if st.button("⚠️ 确认", key="confirm_delete_yes", type="primary"):
+                delete_strategies(pending_ids)
+                state[PENDING_DELETE_KEY] = None
+                _reset_strategy_selection()
+        with col_b:
+            if st.button("❌ 取消", key="confirm_delete_no"):
+                state[PENDING_DELETE_KEY] = None
+                st.rerun()
+
+
+def _reset_strategy_selection():
+    """清空策略表格的勾选状态并刷新页面（策略列表变化后行号会错位）"""
+    st.session_state.pop(STRATEGY_EDITOR_KEY, None)
+    st.rerun()
 
 
 # ============ 策略说明 ============
@@ -513,52 +603,238 @@ def render_strategy_guide():
 
 # ============ 辅助函数 ============
 
+@contextmanager
+def _connection(conn=None):
+    """复用调用方传入的连接；未传入时从连接池借用一个"""
+    if conn is not None:
+        yield conn
+    else:
+        with get_pooled_connection() as pooled_conn:
+            yield pooled_conn
+
+
+@contextmanager
+def _transaction():
+    """在写连接的单个事务内执行多条写操作，成功提交、异常回滚"""
+    with get_db_transaction(row_factory=False) as (db, _cursor):
+        yield db
+
+
+@st.cache_resource
+def get_template_engine():
+    """获取策略模板引擎（跨 rerun 共享同一实例）"""
+    return StrategyTemplateEngine()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_strategy_index():
+    """
+    获取策略选择所需的索引（带缓存）
+
+    返回:
+        {
+            'categories': [分类名, ...],
+            'ids': {分类名: [strategy_id, ...]},
+            'names': {strategy_id: 策略名称}
+        }
+    """
+    all_strategies = get_template_engine().get_all_strategies_ui_config()
+
+    return {
+        'categories': list(all_strategies),
+        'ids': {
+            category: [s['id'] for s in strategies]
+            for category, strategies in all_strategies.items()
+        },
+        'names': {
+            s['id']: s['name']
+            for strategies in all_strategies.values()
+            for s in strategies
+        }
+    }
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_strategy_ui_config(strategy_id):
+    """获取单个策略的UI配置（带缓存，同时预先生成各控件的 key 和显示标签）"""
+    strategy_config = get_template_engine().get_strategy_ui_config(strategy_id)
+
+    for cond_config in strategy_config['conditions']:
+        cond_config['key'] = f"v2_cond_{cond_config['id']}"
+        cond_config['display_label'] = (
+            f"{cond_config['label']}  ⚠️ 必需" if cond_config['required'] else cond_config['label']
+        )
+        for param_config in cond_config['params']:
+            param_config['key'] = f"v2_param_{param_config['name']}"
+            _prepare_param_config(param_config)
+
+    return strategy_config
+
+
+def _prepare_param_config(param_config):
+    """
+    按参数类型预先转换默认值和范围（模板加载时执行一次，渲染时直接使用）
+
+    参数:
+        param_config: 参数配置字典（原地修改）
+    """
+    param_type = param_config['type']
+
+    if param_type in NUMERIC_PARAM_STEPS:
+        cast = int if param_type == 'int' else float
+        for field in ('default', 'min', 'max', 'step'):
+            if param_config.get(field) is not None:
+                param_config[field] = cast(param_config[field])
+        if not param_config.get('step'):
+            param_config['step'] = NUMERIC_PARAM_STEPS[param_type]
+        param_config['use_slider'] = param_config.get('min') is not None and param_config.get('max') is not None
+    elif param_type == 'bool':
+        param_config['default'] = bool(param_config['default'])
+    else:
+        param_config['default'] = str(param_config['default'])
+
+
+# 参数组合随滑块取值变化，限制缓存条数，避免长时间运行后缓存无限增长
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def build_strategy_sql(strategy_id, selected_conditions, params_items):
+    """
+    生成策略SQL（带缓存，相同输入直接返回缓存结果）
+
+    参数:
+        strategy_id: 策略ID
+        selected_conditions: 选中的条件ID元组
+        params_items: 排序后的 (参数名, 参数值) 元组
+
+    返回:
+        (where_clause, params): WHERE子句和参数列表
+    """
+    user_config = {
+        'selected_conditions': list(selected_conditions),
+        'params': dict(params_items)
+    }
+    return get_template_engine().build_sql(strategy_id, user_config)
+
+
+def _dumps_json(obj):
+    """
+    序列化为JSON（优先使用 orjson，未安装时回退到标准库）
+
+    返回:
+        orjson 可用时为UTF-8字节（直接绑定到SQL，不再解码为 str），否则为字符串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _parse_params_json(params_json):
+    """解析策略参数JSON，空值或格式错误时返回空字典"""
+    if not params_json:
+        return {}
+    try:
+        if orjson is not None:
+            return orjson.loads(params_json)
+        return json.loads(params_json)
+    except (TypeError, ValueError):
+        return {}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_strategy_overview(user_id):
+    """
+    查询用户策略列表及统计（带缓存，策略变更时需调用 _clear_strategy_cache() 失效）
+
+    两条查询在同一个连接上一次完成，列表与统计共用一个缓存条目
+    """
+    with get_pooled_connection() as conn:
+        results = conn.execute(LIST_STRATEGIES_SQL, [user_id]).fetchall()
+        stats = dict(conn.execute(STRATEGY_STATS_SQL, [user_id]).fetchone())
+
+    strategies = []
+    for row in results:
+        strategy = dict(row)
+        # 在缓存窗口内只解析一次参数JSON
+        strategy['params_obj'] = _parse_params_json(strategy['params_json'])
+        strategies.append(strategy)
+
+    return {'strategies': strategies, 'stats': stats}
+
+
+def _clear_strategy_cache():
+    """策略变更后清除列表和统计缓存"""
+    _cached_strategy_overview.clear()
+
+
+def get_strategy_stats(user_id='default'):
+    """
+    获取用户策略统计
+
+    返回:
+        {'total': 策略总数, 'type_count': 策略类型数, 'active_count': 启用中数量}
+    """
+    try:
+        return _cached_strategy_overview(user_id)['stats']
+
+    except Exception as e:
+        st.error(f"获取策略统计失败: {e}")
+        return {'total': 0, 'type_count': 0, 'active_count': 0}
+
+
 def get_user_strategies(user_id='default'):
-    """获取用户策略列表"""
+    """
+    获取用户策略列表
+
+    返回:
+        策略字典列表，按创建时间倒序
+    """
     try:
-        sql = """
-            SELECT id, strategy_name, strategy_type, template_name,
-                   params_json, description, is_active, created_at
-            FROM user_strategies
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-        """
-
-        results = execute_query(sql, [user_id], fetch_all=True)
-
-        if results:
-            columns = ['id', 'strategy_name', 'strategy_type', 'template_name',
-                      'params_json', 'description', 'is_active', 'created_at']
-            return pd.DataFrame(results, columns=columns)
-        return pd.DataFrame()
+        return _cached_strategy_overview(user_id)['strategies']
 
     except Exception as e:
         st.error(f"获取策略列表失败: {e}")
-        return pd.DataFrame()
+        return []
 
 
 def copy_strategy(strategy_id):
     """复制策略"""
+    return copy_strategies([strategy_id])
+
+
+def toggle_strategy_status(strategy_id, new_status):
+    """切换策略状态"""
+    return set_strategies_status([strategy_id], new_status)
+
+
+def delete_strategy(strategy_id):
+    """删除策略"""
+    return delete_strategies([strategy_id])
+
+
+# ============ 批量操作 ============
+
+def copy_strategies(strategy_ids):
+    """
+    批量复制策略（单个事务内完成）
+
+    参数:
+        strategy_ids: 策略ID列表
+
+    返回:
+        bool: 是否至少复制了一个策略
+    """
     try:
-        # 获取原策略
-        sql = "SELECT * FROM user_strategies WHERE id = ?"
-        result = execute_query(sql, [strategy_id], fetch_one=True)
-
-        if result:
-            # 创建新策略
-            new_name = f"{result['strategy_name']}_副本"
-            data = {
-                'user_id': 'default',
-                'strategy_name': new_name,
-                'strategy_type': result['strategy_type'],
-                'template_name': result['template_name'],
-                'params_json': result['params_json'],
-                'description': f"复制自: {result['strategy_name']}"
-            }
-
-            execute_insert('user_strategies', data)
-            return True
+        with _transaction() as db:
+            cursor = db.executemany(COPY_STRATEGY_SQL, [(strategy_id,) for strategy_id in strategy_ids])
+            copied = cursor.rowcount > 0
+
+        if copied:
+            # 清除缓存
+            _clear_strategy_cache()
+
+        return copied
 
+    except sqlite3.IntegrityError:
+        st.warning("⚠️ 副本名称已存在，请先重命名已有副本")
         return False
 
     except Exception as e:
@@ -566,13 +842,22 @@ def copy_strategy(strategy_id):
         return False
 
 
-def toggle_strategy_status(strategy_id, new_status):
-    """切换策略状态"""
+def set_strategies_status(strategy_ids, is_active):
+    """
+    批量设置策略启用状态（单个事务内完成）
+
+    参数:
+        strategy_ids: 策略ID列表
+        is_active: 是否启用
+
+    返回:
+        bool: 是否成功
+    """
     try:
-        sql = "UPDATE user_strategies SET is_active = ? WHERE id = ?"
-        with get_db_connection() as conn:
-            conn.execute(sql, [new_status, strategy_id])
-            conn.commit()
+        with _transaction() as db:
+            db.executemany(SET_STATUS_SQL, [(is_active, strategy_id) for strategy_id in strategy_ids])
+        # 清除缓存
+        _clear_strategy_cache()
         return True
 
     except Exception as e:
@@ -580,13 +865,21 @@ def toggle_strategy_status(strategy_id, new_status):
         return False
 
 
-def delete_strategy(strategy_id):
-    """删除策略"""
+def delete_strategies(strategy_ids):
+    """
+    批量删除策略（单个事务内完成）
+
+    参数:
+        strategy_ids: 策略ID列表
+
+    返回:
+        bool: 是否成功
+    """
     try:
-        sql = "DELETE FROM user_strategies WHERE id = ?"
-        with get_db_connection() as conn:
-            conn.execute(sql, [strategy_id])
-            conn.commit()
+        with _transaction() as db:
+            db.executemany(DELETE_STRATEGY_SQL, [(strategy_id,) for strategy_id in strategy_ids])
+        # 清除缓存
+        _clear_strategy_cache()
         return True
 
     except Exception as e:
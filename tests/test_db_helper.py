@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+数据库写线程单元测试
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+# 写连接和连接池在首次使用时按 config.DB_PATH 打开，导入 db_helper 前先指向临时库
+_tmp_dir = tempfile.TemporaryDirectory()
+config.DB_PATH = os.path.join(_tmp_dir.name, "test.db")
+
+from utils import db_helper
+
+
+class TestSingleWriter(unittest.TestCase):
+    """写操作经写线程串行执行"""
+
+    @classmethod
+    def setUpClass(cls):
+        db_helper.execute_write(lambda cursor: cursor.execute(
+            "CREATE TABLE write_log (id INTEGER PRIMARY KEY, source TEXT UNIQUE)"
+        ))
+
+    def setUp(self):
+        db_helper.execute_write(lambda cursor: cursor.execute("DELETE FROM write_log"))
+
+    def _sources(self):
+        rows = db_helper.execute_query("SELECT source FROM write_log ORDER BY id", fetch_all=True)
+        return [row[0] for row in rows]
+
+    def test_writes_apply_in_submission_order(self):
+        """同一线程依次提交的写操作按提交顺序落库"""
+        for i in range(20):
+            db_helper.execute_insert('write_log', {'source': f"row{i}"})
+        self.assertEqual(self._sources(), [f"row{i}" for i in range(20)])
+
+    def test_queued_write_waits_for_open_transaction(self):
+        """事务占用写连接期间，其他线程的写操作排队，事务结束后再执行（不会报 database is locked）"""
+        in_transaction = threading.Event()
+        proceed = threading.Event()
+
+        def hold_transaction():
+            with db_helper.get_db_transaction(row_factory=False) as (conn, cursor):
+                in_transaction.set()
+                proceed.wait(5)
+                cursor.execute("INSERT INTO write_log (source) VALUES ('transaction')")
+
+        holder = threading.Thread(target=hold_transaction)
+        holder.start()
+        in_transaction.wait(5)
+
+        writer = threading.Thread(target=db_helper.execute_insert, args=('write_log', {'source': 'queued'}))
+        writer.start()
+        proceed.set()
+        holder.join(5)
+        writer.join(5)
+
+        self.assertEqual(self._sources(), ['transaction', 'queued'])
+
+    def test_error_propagates_and_rolls_back(self):
+        """写操作中的异常原样抛给调用方，且事务被回滚"""
+        def failing_write(cursor):
+            cursor.execute("INSERT INTO write_log (source) VALUES ('rolled back')")
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            db_helper._run_write(failing_write)
+        self.assertEqual(self._sources(), [])
+
+        # 写线程不受影响，后续写入照常执行
+        db_helper.execute_insert('write_log', {'source': 'after'})
+        self.assertEqual(self._sources(), ['after'])
+
+    def test_integrity_error_propagates(self):
+        """约束冲突以 sqlite3.IntegrityError 返回给调用方"""
+        db_helper.execute_insert('write_log', {'source': 'dup'})
+        with self.assertRaises(sqlite3.IntegrityError):
+            db_helper.execute_insert('write_log', {'source': 'dup'})
+
+    def test_nested_write_joins_transaction(self):
+        """事务内调用 execute_insert 加入外层事务，随外层一起回滚"""
+        with self.assertRaises(RuntimeError):
+            with db_helper.get_db_transaction(row_factory=False) as (conn, cursor):
+                db_helper.execute_insert('write_log', {'source': 'nested'})
+                raise RuntimeError("abort")
+        self.assertEqual(self._sources(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
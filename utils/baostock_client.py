@@ -4,12 +4,45 @@ baostock数据客户端封装
 提供股票数据下载功能
 """
 
+import atexit
+import functools
+import importlib.util
+import os
+import random
+import re
 import baostock as bs
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import config
 
+# 查询失败时的重试次数和指数退避基数（秒）
+QUERY_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# 值得重试的 baostock 错误码：会话失效（未登录）和网络类错误（100020xx）；
+# 代码不存在、日期范围错误等参数类错误重试也不会成功，直接返回
+SESSION_ERROR_CODES = frozenset({'10001001'})
+NETWORK_ERROR_PREFIX = '10002'
+
+# 批量下载时请求间隔的上限（秒）
+MAX_REQUEST_INTERVAL = 30
+
+# 写 parquet 文件可用的引擎（pandas.to_parquet 需要其中之一）
+PARQUET_ENGINES = ('pyarrow', 'fastparquet')
+
+# K线价格字段
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# 每个交易日的K线数量（按自然日预估行数，周末和节假日会留出余量）
+BARS_PER_DAY = {'d': 1, '60': 4, '30': 8, '15': 16, '5': 48}
+DEFAULT_ROW_CAPACITY = 256
+
+# 股票代码格式: 600000.SH 或 sh.600000（baostock 只提供沪深两市数据，北交所 .BJ 代码不在其中）
+CODE_PATTERN = re.compile(r'\d{6}\.(?:SH|SZ)|(?:sh|sz)\.\d{6}')
+
 
 # ============ baostock客户端类 ============
 
@@ -27,6 +60,8 @@ class BaostockClient:
         """初始化客户端"""
         self._lg = None
         self.is_logged_in = False
+        self.error_count = 0  # 查询失败累计次数，批量下载据此调整请求间隔
+        self.rejected_codes = []  # 最近一次批量下载中因格式不符被跳过的代码
 
     def login(self):
         """
@@ -77,7 +112,7 @@ class BaostockClient:
             adjustflag: 复权类型 (1=后复权, 2=前复权, 3=不复权)
 
         返回:
-            DataFrame: 股票数据，失败返回None
+            DataFrame: 股票数据（date 列为 datetime64），失败返回None
         """
         if not self.is_logged_in:
             if not self.login():
@@ -100,7 +135,8 @@ class BaostockClient:
             fields = "date,time,open,high,low,close,volume,amount"
 
         # 获取数据
-        rs = bs.query_history_k_data_plus(
+        rs = self._query(
+            bs.query_history_k_data_plus,
             code,
             fields,
             start_date=start_date,
@@ -113,62 +149,75 @@ class BaostockClient:
             print(f"获取数据失败: {rs.error_msg}")
             return None
 
-        # 转换为DataFrame
-        data_list = []
-        while (rs.error_code == '0') & rs.next():
-            data_list.append(rs.get_row_data())
+        # 按日期区间预估行数，预先分配对象数组逐行填充，预估不足时容量翻倍
+        rows = np.empty((self._estimate_rows(start_date, end_date, bs_frequency), len(rs.fields)), dtype=object)
+        count = 0
+        while rs.error_code == '0' and rs.next():
+            if count == len(rows):
+                rows = np.concatenate([rows, np.empty_like(rows)])
+            rows[count] = rs.get_row_data()
+            count += 1
 
-        if not data_list:
+        if count == 0:
             return None
 
-        df = pd.DataFrame(data_list, columns=rs.fields)
+        # 截掉多余的预留行，按列构建DataFrame
+        rows = rows[:count]
+        df = pd.DataFrame({field: rows[:, i] for i, field in enumerate(rs.fields)})
 
         # 处理分钟线的时间戳：将 date 和 time 合并成完整的 timestamp
         if 'time' in df.columns:
-            # time 字段格式: '20250103103000000' -> 需要转换为 '2025-01-03 10:30:00'
-            def parse_baostock_time(time_str):
-                """解析 baostock 时间格式: 20250103103000000 -> 2025-01-03 10:30:00"""
-                try:
-                    time_str = str(time_str)
-                    if len(time_str) >= 14:
-                        year = time_str[0:4]
-                        month = time_str[4:6]
-                        day = time_str[6:8]
-                        hour = time_str[8:10]
-                        minute = time_str[10:12]
-                        second = time_str[12:14]
-                        return f"{year}-{month}-{day} {hour}:{minute}:{second}"
-                    return time_str
-                except:
-                    return time_str
-
-            # 创建完整的 timestamp 列
-            df['date'] = df['time'].apply(parse_baostock_time)
+            # time 字段格式: '20250103103000000' -> 2025-01-03 10:30:00
+            # 取前14位按固定格式整列解析，避免逐行调用Python函数
+            df['date'] = pd.to_datetime(
+                df['time'].str.slice(0, 14),
+                format='%Y%m%d%H%M%S',
+                errors='coerce',
+                cache=True
+            )
             df.drop('time', axis=1, inplace=True)
+        else:
+            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce', cache=True)
 
         # 转换数据类型并进行精度控制
         df['code'] = stock_code  # 添加股票代码列
 
+        # 所有数值列拼成一个数组，只调用一次 pd.to_numeric 完成转换
+        has_turn = 'turn' in df.columns
+        numeric_cols = PRICE_COLUMNS + ['volume', 'amount'] + (['turn'] if has_turn else [])
+        values = pd.to_numeric(
+            df[numeric_cols].to_numpy().ravel(),
+            errors='coerce'
+        ).astype(np.float64, copy=False).reshape(len(df), len(numeric_cols))
+
         # 价格字段：保留2位小数（A股价格最小变动单位0.01元）
-        df['open'] = pd.to_numeric(df['open'], errors='coerce').round(2)
-        df['high'] = pd.to_numeric(df['high'], errors='coerce').round(2)
-        df['low'] = pd.to_numeric(df['low'], errors='coerce').round(2)
-        df['close'] = pd.to_numeric(df['close'], errors='coerce').round(2)
+        # 不复权数据本身最多2位小数，解析结果无需再取整
+        # 以下取整和填充都在 values 上原地完成，不产生中间数组
+        prices = values[:, :4]
+        if str(adjustflag) != '3':
+            np.round(prices, 2, out=prices)
+        df[PRICE_COLUMNS] = prices
+
+        # 成交量、成交额、换手率：NaN 填充为 0
+        rest = values[:, 4:]
+        np.nan_to_num(rest, copy=False, nan=0.0)
 
-        # 成交量：整数（手），先填充 NaN 为 0 再转换
-        df['volume'] = pd.to_numeric(df['volume'], errors='coerce').fillna(0).astype(int)
+        # 成交量：整数（手）
+        df['volume'] = rest[:, 0].astype(np.int64)
 
-        # 成交额：保留2位小数（元），NaN 填充为 0
-        df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0).round(2)
+        # 成交额：保留2位小数（元）
+        amount = rest[:, 1]
+        df['amount'] = np.round(amount, 2, out=amount)
 
-        # turn（换手率）字段只在日线数据中存在，保留4位小数，NaN 填充为 0
-        if 'turn' in df.columns:
-            df['turn'] = pd.to_numeric(df['turn'], errors='coerce').fillna(0).round(4)
+        # turn（换手率）字段只在日线数据中存在，保留4位小数
+        if has_turn:
+            turn = rest[:, 2]
+            df['turn'] = np.round(turn, 4, out=turn)
 
         return df
 
     def download_batch_stocks(self, stock_codes, start_date, end_date, frequency="d",
-                              progress_callback=None, delay=0.5):
+                              progress_callback=None, delay=0.5, workers=1, sink_path=None):
         """
         批量下载股票数据
 
@@ -178,25 +227,115 @@ class BaostockClient:
             end_date: 结束日期
             frequency: 数据周期
             progress_callback: 进度回调函数 callback(current, total, stock_code)
-            delay: 每次请求之间的延迟（秒）
+            delay: 相邻两次请求发起的最小间隔（秒），查询出错时会自动放大
+            workers: 并行进程数，大于1时股票分组交给多个进程下载（每个进程独立登录）
+            sink_path: 输出目录，指定时每只股票下载后立即写入 <sink_path>/<stock_code>.parquet
+                       并释放内存，不再在内存中保留整批数据
 
         返回:
-            dict: {stock_code: DataFrame}
+            dict: {stock_code: DataFrame}，指定 sink_path 时为 {stock_code: parquet文件路径}
+            下载失败的代码不在结果中；格式不符的代码（包括 baostock 不支持的北交所 .BJ 代码）
+            不发起请求，同样不在结果中，并记录在 self.rejected_codes 里供调用方列入失败列表
         """
+        # 格式不合法的代码直接跳过，不发起网络请求
+        valid_codes = []
+        rejected = []
+        for code in stock_codes:
+            (valid_codes if self.validate_code_format(code) else rejected).append(code)
+        self.rejected_codes = rejected
+        if rejected:
+            print(f"跳过格式不符的股票代码（baostock 仅支持沪深两市）: {', '.join(map(str, rejected))}")
+        stock_codes = valid_codes
+
+        # 先确认能写 parquet，避免下载到一半才因缺少引擎失败
+        if sink_path and not any(importlib.util.find_spec(engine) for engine in PARQUET_ENGINES):
+            raise ImportError("指定 sink_path 需要安装 pyarrow 或 fastparquet：pip install pyarrow")
+
+        if workers > 1 and len(stock_codes) > 1:
+            return self._download_batch_parallel(
+                stock_codes, start_date, end_date, frequency, progress_callback, delay, workers, sink_path
+            )
+
+        if sink_path:
+            os.makedirs(sink_path, exist_ok=True)
+
         results = {}
         total = len(stock_codes)
+        next_request_at = 0.0
+        interval = delay
+
+        # 循环内反复用到的属性和函数先绑定为局部变量
+        monotonic = time.monotonic
+        sleep = time.sleep
+        download = self.download_stock_data
+        report_progress = progress_callback is not None
 
         for i, code in enumerate(stock_codes):
-            if progress_callback:
+            if report_progress:
                 progress_callback(i + 1, total, code)
 
-            df = self.download_stock_data(code, start_date, end_date, frequency)
+            # 限速：保证相邻两次请求的发起间隔不小于 interval，
+            # 请求本身的耗时计入间隔，不再在其之外额外休眠
+            wait = next_request_at - monotonic()
+            if wait > 0:
+                sleep(wait)
+            next_request_at = monotonic() + interval
+
+            errors_before = self.error_count
+            df = download(code, start_date, end_date, frequency)
+
+            # 自适应间隔：查询出错时加倍（带抖动，上限 MAX_REQUEST_INTERVAL），
+            # 正常时逐步减半回到 delay
+            if self.error_count > errors_before:
+                interval = min(max(interval, RETRY_BACKOFF) * 2 * random.uniform(1.0, 1.25), MAX_REQUEST_INTERVAL)
+            else:
+                interval = max(delay, interval / 2)
+
             if df is not None and not df.empty:
-                results[code] = df
+                if sink_path:
+                    file_path = os.path.join(sink_path, f"{code}.parquet")
+                    df.to_parquet(file_path, index=False)
+                    results[code] = file_path
+                else:
+                    results[code] = df
+
+        return results
+
+    @staticmethod
+    def _download_batch_parallel(stock_codes, start_date, end_date, frequency,
+                                 progress_callback, delay, workers, sink_path):
+        """
+        多进程批量下载：股票按轮询分组，每组在独立进程中用独立的baostock会话下载
+
+        参数:
+            同 download_batch_stocks
+
+        返回:
+            dict: {stock_code: DataFrame} 或 {stock_code: parquet文件路径}
+        """
+        stock_codes = list(stock_codes)
+        chunks = [stock_codes[i::workers] for i in range(workers)]
+        chunks = [chunk for chunk in chunks if chunk]
 
-            # 延迟，避免请求过快
-            if i < total - 1:
-                time.sleep(delay)
+        results = {}
+        total = len(stock_codes)
+        done = 0
+
+        # delay 是整批请求的发起间隔，分摊到各进程后每个进程按 delay * 进程数 限速，
+        # 保证对 baostock 的总请求频率和单进程下载时一致
+        worker_delay = delay * len(chunks)
+
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = {
+                executor.submit(_download_chunk, chunk, start_date, end_date, frequency, worker_delay, sink_path): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                results.update(future.result())
+                done += len(chunk)
+                if progress_callback:
+                    progress_callback(done, total, chunk[-1])
 
         return results
 
@@ -216,13 +355,13 @@ class BaostockClient:
 
         code = self._convert_code_format(stock_code, reverse=True)
 
-        rs = bs.query_stock_basic(code=code)
+        rs = self._query(bs.query_stock_basic, code=code)
 
         if rs.error_code != '0':
             return None
 
         data_list = []
-        while (rs.error_code == '0') & rs.next():
+        while rs.error_code == '0' and rs.next():
             data_list.append(rs.get_row_data())
 
         if not data_list:
@@ -245,25 +384,86 @@ class BaostockClient:
             if not self.login():
                 return None
 
-        rs = bs.query_all_stock(day=datetime.now().strftime("%Y-%m-%d"))
+        rs = self._query(bs.query_all_stock, day=datetime.now().strftime("%Y-%m-%d"))
 
         if rs.error_code != '0':
             return None
 
         data_list = []
-        while (rs.error_code == '0') & rs.next():
+        while rs.error_code == '0' and rs.next():
             data_list.append(rs.get_row_data())
 
         if not data_list:
             return None
 
         df = pd.DataFrame(data_list, columns=rs.fields)
-        df['code'] = df['code'].apply(lambda x: self._convert_code_format(x))
+
+        # 整列转换代码格式: sh.600000 -> 600000.SH
+        parts = df['code'].str.partition('.')
+        df['code'] = parts[2] + '.' + parts[0].str.upper()
         return df
 
     # ============ 工具方法 ============
 
     @staticmethod
+    def _estimate_rows(start_date, end_date, bs_frequency):
+        """
+        按日期区间和数据周期预估K线行数（用于预分配数组）
+
+        参数:
+            start_date: 开始日期
+            end_date: 结束日期
+            bs_frequency: baostock格式的数据周期 (d, 60, 30, 15, 5)
+
+        返回:
+            int: 预估行数（日期无法解析时返回默认值）
+        """
+        try:
+            days = (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days + 1
+        except (ValueError, TypeError):
+            return DEFAULT_ROW_CAPACITY
+        return max(days, 1) * BARS_PER_DAY.get(bs_frequency, 1)
+
+    def _query(self, query_func, *args, **kwargs):
+        """
+        执行baostock查询，会话失效或网络错误时重新登录并按指数退避重试
+
+        参数:
+            query_func: baostock查询函数（如 bs.query_history_k_data_plus）
+            *args, **kwargs: 查询参数
+
+        返回:
+            最后一次查询的结果集
+        """
+        for attempt in range(QUERY_RETRIES):
+            rs = query_func(*args, **kwargs)
+            if rs.error_code == '0':
+                return rs
+
+            # 参数类错误不重试，也不计入 error_count（不影响批量下载的请求间隔）
+            if not self._is_retryable_error(rs.error_code):
+                return rs
+
+            # 每次查询只计一次，避免多次重试把自适应间隔放大过头
+            if attempt == 0:
+                self.error_count += 1
+            if attempt == QUERY_RETRIES - 1:
+                return rs
+
+            time.sleep(RETRY_BACKOFF * (2 ** attempt) * random.uniform(1.0, 1.25))
+            # 会话可能已失效，重新登录后再试
+            self.is_logged_in = False
+            self.login()
+
+        return rs
+
+    @staticmethod
+    def _is_retryable_error(error_code):
+        """判断 baostock 错误码是否属于会话失效或网络错误（可重试）"""
+        return error_code in SESSION_ERROR_CODES or error_code.startswith(NETWORK_ERROR_PREFIX)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
     def _convert_code_format(code, reverse=False):
         """
         转换股票代码格式
@@ -302,18 +502,41 @@ class BaostockClient:
             bool: 格式是否正确
         """
         # 支持两种格式: 600000.SH 或 sh.600000
-        if '.' in code:
-            parts = code.split('.')
-            if len(parts) == 2:
-                if parts[0].isdigit() and parts[1] in ['SH', 'SZ']:
-                    return True
-                if parts[1].isdigit() and parts[0] in ['sh', 'sz']:
-                    return True
-        return False
+        return CODE_PATTERN.fullmatch(code) is not None
+
+
+# ============ 多进程下载 ============
+
+def _download_chunk(stock_codes, start_date, end_date, frequency, delay, sink_path):
+    """
+    子进程任务：登录独立会话并下载一组股票
+
+    返回:
+        dict: {stock_code: DataFrame} 或 {stock_code: parquet文件路径}
+    """
+    with BaostockClient() as client:
+        return client.download_batch_stocks(
+            stock_codes, start_date, end_date, frequency, delay=delay, sink_path=sink_path
+        )
 
 
 # ============ 便捷函数 ============
 
+@functools.lru_cache(maxsize=None)
+def get_shared_client():
+    """
+    获取进程内共享的baostock客户端（首次调用时创建，进程退出时登出）
+
+    便捷函数复用同一个已登录的会话，避免每次调用都登录/登出
+
+    返回:
+        BaostockClient: 共享客户端
+    """
+    client = BaostockClient()
+    atexit.register(client.logout)
+    return client
+
+
 def download_stock_data(stock_code, start_date, end_date, frequency="d"):
     """
     便捷函数：下载单只股票数据
@@ -327,8 +550,7 @@ def download_stock_data(stock_code, start_date, end_date, frequency="d"):
     返回:
         DataFrame: 股票数据
     """
-    with BaostockClient() as client:
-        return client.download_stock_data(stock_code, start_date, end_date, frequency)
+    return get_shared_client().download_stock_data(stock_code, start_date, end_date, frequency)
 
 
 def get_stock_list():
@@ -338,8 +560,7 @@ def get_stock_list():
     返回:
         DataFrame: 股票列表
     """
-    with BaostockClient() as client:
-        return client.get_all_stocks()
+    return get_shared_client().get_all_stocks()
 
 
 # ============ 测试代码 ============
@@ -4,30 +4,44 @@
 提供数据库连接、初始化、查询等功能
 """
 
+import atexit
+import bisect
+import functools
+import os
 import sqlite3
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
+import pandas as pd
 import config
+from utils.db_pool import configure_connection, get_pooled_connection
 
 # ============ 数据库连接管理 ============
 
 @contextmanager
-def get_db_connection():
+def get_db_connection(row_factory=True):
     """
     获取数据库连接（上下文管理器）
 
+    连接从进程级连接池借用，退出时归还（未提交的事务会被回滚），
+    不再每次调用都重新建立连接
+
+    参数:
+        row_factory: 是否以 sqlite3.Row 返回结果；写操作和计数查询传 False，
+                     按位置取值的普通元组，省去每行构造 Row 对象
+
     使用示例:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM stock_daily_history")
     """
-    conn = sqlite3.connect(config.DB_PATH)
-    conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
-    try:
+    with get_pooled_connection() as conn:
+        if not row_factory:
+            conn.row_factory = None
         yield conn
-    finally:
-        conn.close()
 
 
 def get_connection():
@@ -42,11 +56,185 @@ def get_connection():
     """
     conn = sqlite3.connect(config.DB_PATH)
     conn.row_factory = sqlite3.Row
+    configure_connection(conn)
     return conn
 
 
 # ============ 数据库初始化 ============
 
+_SCHEMA_SQL = """
+-- 1. 创建股票日线数据表
+CREATE TABLE IF NOT EXISTS stock_daily_history (
+    ts_code TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+    amount REAL,
+    turnover_ratio REAL,
+    PRIMARY KEY (ts_code, trade_date)
+);
+
+-- 2. 创建分钟线数据表
+CREATE TABLE IF NOT EXISTS stock_minute_history (
+    ts_code TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    frequency TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+    amount REAL,
+    PRIMARY KEY (ts_code, timestamp, frequency)
+);
+
+-- 3. 创建技术指标表
+CREATE TABLE IF NOT EXISTS stock_indicators (
+    ts_code TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    frequency TEXT DEFAULT 'd',
+    -- MA均线
+    ma5 REAL, ma10 REAL, ma20 REAL, ma60 REAL,
+    -- 成交量均线
+    vma5 REAL, vma10 REAL,
+    -- 价格变化
+    change_pct REAL,
+    change_5d REAL,
+    -- MACD
+    dif REAL, dea REAL, macd REAL,
+    -- KDJ
+    k REAL, d REAL, j REAL,
+    -- RSI
+    rsi6 REAL, rsi12 REAL, rsi24 REAL,
+    -- 布林带
+    boll_upper REAL, boll_mid REAL, boll_lower REAL,
+    -- ATR
+    atr14 REAL,
+    PRIMARY KEY (ts_code, trade_date, frequency)
+);
+
+-- 4. 创建股票池表
+CREATE TABLE IF NOT EXISTS stock_pool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts_code TEXT NOT NULL UNIQUE,
+    stock_name TEXT,
+    pool_name TEXT DEFAULT 'default',
+    add_date DATE DEFAULT CURRENT_DATE,
+    note TEXT,
+    symbol TEXT,
+    area TEXT,
+    industry TEXT,
+    list_date TEXT
+);
+
+-- 5. 创建用户策略表
+CREATE TABLE IF NOT EXISTS user_strategies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT DEFAULT 'default',
+    strategy_name TEXT NOT NULL,
+    strategy_type TEXT,
+    template_name TEXT,
+    params_json TEXT,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_active BOOLEAN DEFAULT 1
+);
+
+-- 6. 创建选股历史表
+CREATE TABLE IF NOT EXISTS selection_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy_id INTEGER,
+    strategy_name TEXT,
+    execute_date DATE,
+    stock_pool TEXT,
+    result_count INTEGER,
+    results_json TEXT,
+    execution_time REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (strategy_id) REFERENCES user_strategies(id)
+);
+
+-- 7. 创建监控任务表
+CREATE TABLE IF NOT EXISTS monitor_tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_name TEXT NOT NULL,
+    stock_code TEXT NOT NULL,
+    condition_type TEXT,
+    condition_value REAL,
+    condition_json TEXT,
+    is_active BOOLEAN DEFAULT 1,
+    last_check_time TIMESTAMP,
+    triggered_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 8. 创建监控提醒表
+CREATE TABLE IF NOT EXISTS monitor_alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER,
+    stock_code TEXT,
+    triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    trigger_message TEXT,
+    current_value REAL,
+    is_read BOOLEAN DEFAULT 0,
+    FOREIGN KEY (task_id) REFERENCES monitor_tasks(id)
+);
+
+-- 9. 创建交易日历表
+CREATE TABLE IF NOT EXISTS stock_trade_calendar (
+    exchange TEXT NOT NULL,
+    cal_date TEXT NOT NULL,
+    is_open INTEGER NOT NULL,
+    pretrade_date TEXT,
+    PRIMARY KEY (exchange, cal_date)
+);
+"""
+
+_INDEX_SQL = """
+-- 旧的单列索引已被主键或下面的复合索引覆盖
+DROP INDEX IF EXISTS idx_stock_daily_code;
+DROP INDEX IF EXISTS idx_stock_daily_date;
+DROP INDEX IF EXISTS idx_indicators_code;
+DROP INDEX IF EXISTS idx_calendar_is_open;
+
+-- stock_daily_history 索引（按股票查询由主键 (ts_code, trade_date) 覆盖）
+CREATE INDEX IF NOT EXISTS idx_daily_date_code
+ON stock_daily_history(trade_date, ts_code);
+
+-- stock_indicators 索引
+CREATE INDEX IF NOT EXISTS idx_ind_code_freq_date
+ON stock_indicators(ts_code, frequency, trade_date DESC);
+CREATE INDEX IF NOT EXISTS idx_indicators_date
+ON stock_indicators(trade_date);
+
+-- user_strategies 索引（按用户列出策略时免排序）
+CREATE INDEX IF NOT EXISTS idx_strategies_user_created
+ON user_strategies(user_id, created_at DESC);
+
+-- selection_history 索引
+CREATE INDEX IF NOT EXISTS idx_selection_date
+ON selection_history(execute_date);
+CREATE INDEX IF NOT EXISTS idx_selection_strategy_date
+ON selection_history(strategy_id, execute_date DESC);
+
+-- monitor_tasks 索引
+CREATE INDEX IF NOT EXISTS idx_monitor_active
+ON monitor_tasks(is_active);
+
+-- monitor_alerts 索引
+CREATE INDEX IF NOT EXISTS idx_alerts_read
+ON monitor_alerts(is_read);
+
+-- stock_trade_calendar 索引
+CREATE INDEX IF NOT EXISTS idx_calendar_open_date
+ON stock_trade_calendar(is_open, cal_date);
+"""
+
+
 def init_db():
     """
     初始化数据库，创建所有表和索引
@@ -56,214 +244,98 @@ def init_db():
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        # 1. 创建股票日线数据表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stock_daily_history (
-                ts_code TEXT NOT NULL,
-                trade_date TEXT NOT NULL,
-                open REAL,
-                high REAL,
-                low REAL,
-                close REAL,
-                volume INTEGER,
-                amount REAL,
-                turnover_ratio REAL,
-                PRIMARY KEY (ts_code, trade_date)
-            )
-        """)
+        # 一次执行全部建表语句
+        cursor.executescript(_SCHEMA_SQL)
 
-        # 2. 创建分钟线数据表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stock_minute_history (
-                ts_code TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                frequency TEXT NOT NULL,
-                open REAL,
-                high REAL,
-                low REAL,
-                close REAL,
-                volume INTEGER,
-                amount REAL,
-                PRIMARY KEY (ts_code, timestamp, frequency)
-            )
-        """)
+        # 导入交易日历数据（如果表为空）
+        cursor.execute("SELECT COUNT(*) as count FROM stock_trade_calendar")
+        if cursor.fetchone()['count'] == 0:
+            _import_trade_calendar(cursor)
 
-        # 3. 创建技术指标表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stock_indicators (
-                ts_code TEXT NOT NULL,
-                trade_date TEXT NOT NULL,
-                frequency TEXT DEFAULT 'd',
-                -- MA均线
-                ma5 REAL, ma10 REAL, ma20 REAL, ma60 REAL,
-                -- 成交量均线
-                vma5 REAL, vma10 REAL,
-                -- 价格变化
-                change_pct REAL,
-                change_5d REAL,
-                -- MACD
-                dif REAL, dea REAL, macd REAL,
-                -- KDJ
-                k REAL, d REAL, j REAL,
-                -- RSI
-                rsi6 REAL, rsi12 REAL, rsi24 REAL,
-                -- 布林带
-                boll_upper REAL, boll_mid REAL, boll_lower REAL,
-                -- ATR
-                atr14 REAL,
-                PRIMARY KEY (ts_code, trade_date, frequency)
-            )
-        """)
+        # 创建索引（放在批量导入之后，导入时无需逐行维护索引）
+        _create_indexes(cursor)
 
-        # 4. 创建股票池表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stock_pool (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ts_code TEXT NOT NULL UNIQUE,
-                stock_name TEXT,
-                pool_name TEXT DEFAULT 'default',
-                add_date DATE DEFAULT CURRENT_DATE,
-                note TEXT,
-                symbol TEXT,
-                area TEXT,
-                industry TEXT,
-                list_date TEXT
-            )
-        """)
+        conn.commit()
 
-        # 5. 创建用户策略表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_strategies (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT DEFAULT 'default',
-                strategy_name TEXT NOT NULL,
-                strategy_type TEXT,
-                template_name TEXT,
-                params_json TEXT,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_active BOOLEAN DEFAULT 1
-            )
-        """)
+    print("数据库初始化完成！")
 
-        # 6. 创建选股历史表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS selection_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                strategy_id INTEGER,
-                strategy_name TEXT,
-                execute_date DATE,
-                stock_pool TEXT,
-                result_count INTEGER,
-                results_json TEXT,
-                execution_time REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (strategy_id) REFERENCES user_strategies(id)
-            )
-        """)
 
-        # 7. 创建监控任务表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS monitor_tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                task_name TEXT NOT NULL,
-                stock_code TEXT NOT NULL,
-                condition_type TEXT,
-                condition_value REAL,
-                condition_json TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                last_check_time TIMESTAMP,
-                triggered_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+def _create_indexes(cursor):
+    """
+    创建数据库索引以优化查询性能
+    """
+    cursor.executescript(_INDEX_SQL)
 
-        # 8. 创建监控提醒表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS monitor_alerts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                task_id INTEGER,
-                stock_code TEXT,
-                triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                trigger_message TEXT,
-                current_value REAL,
-                is_read BOOLEAN DEFAULT 0,
-                FOREIGN KEY (task_id) REFERENCES monitor_tasks(id)
-            )
-        """)
+    _create_strategy_name_index(cursor)
+
+
+def _create_strategy_name_index(cursor):
+    """
+    创建 user_strategies 唯一索引（同一用户下策略名不可重复），已有重复数据时跳过
 
-        # 9. 创建交易日历表
+    返回:
+        bool: 索引是否已就绪
+    """
+    try:
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stock_trade_calendar (
-                exchange TEXT NOT NULL,
-                cal_date TEXT NOT NULL,
-                is_open INTEGER NOT NULL,
-                pretrade_date TEXT,
-                PRIMARY KEY (exchange, cal_date)
-            )
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_user_strategy_name
+            ON user_strategies(user_id, strategy_name)
         """)
+        return True
+    except sqlite3.IntegrityError as e:
+        print(f"⚠️ 已存在重复的策略名称，跳过唯一索引创建: {e}")
+        return False
 
-        # 创建索引
-        _create_indexes(cursor)
 
-        # 导入交易日历数据（如果表为空）
-        cursor.execute("SELECT COUNT(*) as count FROM stock_trade_calendar")
-        if cursor.fetchone()['count'] == 0:
-            _import_trade_calendar(cursor)
+_strategy_name_index_checked = False
 
-        conn.commit()
 
-    print("数据库初始化完成！")
+def ensure_strategy_name_index():
+    """
+    确保策略名唯一索引存在（应用启动时调用，进程内只检查一次）
 
+    保存策略依赖该索引拒绝重名；已有数据库未执行过 init_db 或迁移脚本时在这里补建
+    """
+    global _strategy_name_index_checked
+    if _strategy_name_index_checked:
+        return
 
-def _create_indexes(cursor):
+    try:
+        with get_db_connection(row_factory=False) as conn:
+            _create_strategy_name_index(conn.cursor())
+            conn.commit()
+        _strategy_name_index_checked = True
+    except sqlite3.OperationalError as e:
+        # 表尚未创建（数据库未初始化），下次启动时再检查
+        print(f"⚠️ 无法创建策略名唯一索引: {e}")
+
+
+@contextmanager
+def with_deferred_indexes(cursor, table_name):
     """
-    创建数据库索引以优化查询性能
+    批量导入期间暂时删除表上的索引，导入结束后按原定义重建
+
+    参数:
+        cursor: 数据库游标
+        table_name: 表名
+
+    使用示例:
+        with with_deferred_indexes(cursor, 'stock_daily_history'):
+            cursor.executemany("INSERT INTO stock_daily_history ...", rows)
     """
-    # stock_daily_history 索引
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_stock_daily_code
-        ON stock_daily_history(ts_code)
-    """)
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_stock_daily_date
-        ON stock_daily_history(trade_date)
-    """)
-
-    # stock_indicators 索引
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_indicators_code
-        ON stock_indicators(ts_code)
-    """)
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_indicators_date
-        ON stock_indicators(trade_date)
-    """)
-
-    # selection_history 索引
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_selection_date
-        ON selection_history(execute_date)
-    """)
-
-    # monitor_tasks 索引
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_monitor_active
-        ON monitor_tasks(is_active)
-    """)
-
-    # monitor_alerts 索引
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_alerts_read
-        ON monitor_alerts(is_read)
-    """)
-
-    # stock_trade_calendar 索引
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_calendar_is_open
-        ON stock_trade_calendar(is_open)
-    """)
+    # sql 为空的是主键/唯一约束自动生成的索引，不能删除
+    indexes = cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table_name,)
+    ).fetchall()
+
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+    try:
+        yield
+    finally:
+        for _, sql in indexes:
+            cursor.execute(sql)
 
 
 def _import_trade_calendar(cursor):
@@ -273,7 +345,6 @@ def _import_trade_calendar(cursor):
     参数:
         cursor: 数据库游标
     """
-    import os
     try:
         csv_path = config.TRADE_CALENDAR_CSV
 
@@ -281,31 +352,91 @@ def _import_trade_calendar(cursor):
             print(f"⚠️ 交易日历文件不存在: {csv_path}")
             return
 
-        import csv
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            data = []
-            for row in reader:
-                data.append({
-                    'exchange': row['exchange'],
-                    'cal_date': row['cal_date'],
-                    'is_open': int(row['is_open']),
-                    'pretrade_date': row['pretrade_date']
-                })
-
-            # 批量插入
-            cursor.executemany(
-                """INSERT INTO stock_trade_calendar (exchange, cal_date, is_open, pretrade_date)
-                   VALUES (?, ?, ?, ?)""",
-                [(d['exchange'], d['cal_date'], d['is_open'], d['pretrade_date']) for d in data]
-            )
-
-        print(f"✅ 已导入 {len(data)} 条交易日历数据")
+        conn = cursor.connection
+
+        # 使用 pandas 的 C 解析器读取并完成类型转换，日期保持原始字符串
+        columns = ['exchange', 'cal_date', 'is_open', 'pretrade_date']
+        df = pd.read_csv(
+            csv_path,
+            encoding='utf-8-sig',
+            usecols=columns,
+            dtype={'exchange': str, 'cal_date': str, 'is_open': 'int8', 'pretrade_date': str},
+            keep_default_na=False
+        )[columns]
+
+        # 批量导入在单个事务中完成，期间临时关闭同步写盘
+        conn.execute("PRAGMA synchronous=OFF")
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            with with_deferred_indexes(cursor, 'stock_trade_calendar'):
+                cursor.executemany(
+                    """INSERT INTO stock_trade_calendar (exchange, cal_date, is_open, pretrade_date)
+                       VALUES (?, ?, ?, ?)""",
+                    df.itertuples(index=False, name=None)
+                )
+                imported = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+        print(f"✅ 已导入 {imported} 条交易日历数据")
+        reload_calendar()
 
     except Exception as e:
         print(f"❌ 导入交易日历失败: {e}")
 
 
+# ============ 交易日历缓存 ============
+# 交易日历数据量小且很少变化，整表加载到内存后由 set/dict/二分查找直接回答
+
+_calendar_cache = None
+_calendar_lock = threading.Lock()
+
+_SQL_LOAD_CALENDAR = """
+    SELECT cal_date, is_open, pretrade_date
+    FROM stock_trade_calendar
+    ORDER BY cal_date
+"""
+
+
+def _get_calendar():
+    """
+    获取内存中的交易日历（首次调用时从数据库加载）
+
+    返回:
+        dict: {
+            'open_dates': 交易日集合,
+            'sorted_open': 升序排列的交易日元组,
+            'pretrade': {cal_date: pretrade_date}
+        }
+    """
+    global _calendar_cache
+    if _calendar_cache is None:
+        with _calendar_lock:
+            if _calendar_cache is None:
+                with get_db_connection(row_factory=False) as conn:
+                    rows = conn.execute(_SQL_LOAD_CALENDAR).fetchall()
+
+                sorted_open = tuple(cal_date for cal_date, is_open, _ in rows if is_open == 1)
+                _calendar_cache = {
+                    'open_dates': frozenset(sorted_open),
+                    'sorted_open': sorted_open,
+                    'pretrade': {cal_date: pretrade_date for cal_date, _, pretrade_date in rows}
+                }
+    return _calendar_cache
+
+
+def reload_calendar():
+    """清除交易日历缓存，下次查询时重新从数据库加载"""
+    global _calendar_cache
+    with _calendar_lock:
+        _calendar_cache = None
+
+
 def get_latest_trade_date(target_date=None):
     """
     获取最近的交易日
@@ -318,29 +449,17 @@ def get_latest_trade_date(target_date=None):
               如果 target_date 是交易日，返回 target_date
               如果 target_date 是非交易日，返回之前的最近交易日
     """
-    from datetime import datetime
-
     if target_date is None:
         target_date = datetime.now().strftime('%Y-%m-%d')
 
     try:
-        with get_db_connection() as conn:
-            # 查询小于等于目标日期的最近交易日
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT cal_date
-                FROM stock_trade_calendar
-                WHERE cal_date <= ? AND is_open = 1
-                ORDER BY cal_date DESC
-                LIMIT 1
-            """, (target_date,))
-
-            result = cursor.fetchone()
-            if result:
-                return result['cal_date']
-            else:
-                # 如果没找到，返回目标日期（容错）
-                return target_date
+        # 小于等于目标日期的最近交易日
+        sorted_open = _get_calendar()['sorted_open']
+        index = bisect.bisect_right(sorted_open, target_date)
+        if index:
+            return sorted_open[index - 1]
+        # 如果没找到，返回目标日期（容错）
+        return target_date
 
     except Exception as e:
         print(f"❌ 获取交易日失败: {e}")
@@ -358,19 +477,7 @@ def is_trade_date(date_str):
         bool: True表示是交易日，False表示非交易日
     """
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT is_open
-                FROM stock_trade_calendar
-                WHERE cal_date = ?
-                LIMIT 1
-            """, (date_str,))
-
-            result = cursor.fetchone()
-            if result:
-                return result['is_open'] == 1
-            return False
+        return date_str in _get_calendar()['open_dates']
 
     except Exception as e:
         print(f"❌ 判断交易日失败: {e}")
@@ -388,33 +495,19 @@ def get_previous_trade_date(date_str):
         str: 上一个交易日，格式 'YYYY-MM-DD'
     """
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT pretrade_date
-                FROM stock_trade_calendar
-                WHERE cal_date = ?
-                LIMIT 1
-            """, (date_str,))
-
-            result = cursor.fetchone()
-            if result and result['pretrade_date']:
-                return result['pretrade_date']
-
-            # 如果没有找到，查询最近的小于指定日期的交易日
-            cursor.execute("""
-                SELECT cal_date
-                FROM stock_trade_calendar
-                WHERE cal_date < ? AND is_open = 1
-                ORDER BY cal_date DESC
-                LIMIT 1
-            """, (date_str,))
-
-            result = cursor.fetchone()
-            if result:
-                return result['cal_date']
-
-            return None
+        calendar = _get_calendar()
+
+        pretrade_date = calendar['pretrade'].get(date_str)
+        if pretrade_date:
+            return pretrade_date
+
+        # 如果没有找到，取最近的小于指定日期的交易日
+        sorted_open = calendar['sorted_open']
+        index = bisect.bisect_left(sorted_open, date_str)
+        if index:
+            return sorted_open[index - 1]
+
+        return None
 
     except Exception as e:
         print(f"❌ 获取上一交易日失败: {e}")
@@ -436,6 +529,10 @@ def execute_query(sql, params=None, fetch_one=False, fetch_all=False):
     返回:
         查询结果
     """
+    if not (fetch_one or fetch_all):
+        # 不取结果的语句按写操作处理，交给写线程执行
+        return _run_write(lambda cursor: cursor.execute(sql, params or ()).rowcount)
+
     with get_db_connection() as conn:
         cursor = conn.cursor()
         if params:
@@ -445,11 +542,162 @@ def execute_query(sql, params=None, fetch_one=False, fetch_all=False):
 
         if fetch_one:
             return cursor.fetchone()
-        elif fetch_all:
-            return cursor.fetchall()
-        else:
-            conn.commit()
-            return cursor.rowcount
+        return cursor.fetchall()
+
+
+# ============ 写操作 SQL 缓存 ============
+
+# 已确认存在的表名（白名单），遇到未知表名时从 sqlite_master 刷新一次
+_known_tables = set()
+
+
+def _check_table_name(table_name):
+    """
+    校验表名是否为数据库中已存在的表，防止表名拼接注入
+
+    参数:
+        table_name: 表名
+
+    异常:
+        ValueError: 表不存在时抛出
+    """
+    if table_name in _known_tables:
+        return
+
+    with get_db_connection(row_factory=False) as conn:
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    _known_tables.update(row[0] for row in rows)
+
+    if table_name not in _known_tables:
+        raise ValueError(f"未知的表名: {table_name}")
+
+
+@functools.lru_cache(maxsize=512)
+def _insert_sql(table_name, columns, row_count=1):
+    """生成（并缓存）INSERT 语句，columns 为排序后的列名元组"""
+    row_placeholders = '(' + ', '.join(['?'] * len(columns)) + ')'
+    values = ', '.join([row_placeholders] * row_count)
+    return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES {values}"
+
+
+@functools.lru_cache(maxsize=512)
+def _update_sql(table_name, columns, where_clause):
+    """生成（并缓存）UPDATE 语句，columns 为排序后的列名元组"""
+    set_clause = ', '.join([f"{col} = ?" for col in columns])
+    return f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
+
+
+@functools.lru_cache(maxsize=512)
+def _delete_sql(table_name, where_clause):
+    """生成（并缓存）DELETE 语句"""
+    return f"DELETE FROM {table_name} WHERE {where_clause}"
+
+
+# ============ 单写线程 ============
+# 应用运行期间的写操作都在同一个写连接上执行：execute_insert / execute_update /
+# execute_delete / execute_batch_* / execute_write 把写操作排队交给后台写线程，
+# get_db_transaction 在事务期间独占写线程和写连接。读操作仍直接使用连接池。
+# 建库、迁移、导入脚本和后台维护（VACUUM/ANALYZE/检查点）不经过写线程，
+# 与写连接之间仍由 busy_timeout 协调
+
+_writer = None
+_writer_conn = None
+_writer_lock = threading.Lock()
+# 标记当前线程是否正通过 get_db_transaction 占用写连接
+_writer_state = threading.local()
+
+
+def _get_writer():
+    """获取（首次调用时创建）单线程写执行器"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+                atexit.register(_close_writer)
+    return _writer
+
+
+def _get_writer_conn():
+    """获取（首次调用时创建）写连接，只能在写线程或占用写线程的线程中调用"""
+    global _writer_conn
+    if _writer_conn is None:
+        # 同一时刻只有一个线程使用该连接；允许退出时由主线程在写线程结束后关闭
+        _writer_conn = sqlite3.connect(config.DB_PATH, check_same_thread=False)
+        configure_connection(_writer_conn)
+    return _writer_conn
+
+
+def _holds_writer():
+    """当前线程是否为写线程，或正通过 get_db_transaction 占用写连接"""
+    return (threading.current_thread().name.startswith('db-writer')
+            or getattr(_writer_state, 'holding', False))
+
+
+def _write_job(func):
+    """在写连接上执行 func(cursor)，成功提交、失败回滚"""
+    conn = _get_writer_conn()
+    if conn.in_transaction:
+        # 嵌套在 get_db_transaction 的事务中，随外层事务一起提交或回滚
+        return func(conn.cursor())
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = func(conn.cursor())
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _run_write(func):
+    """
+    把写操作提交给写线程并等待结果
+
+    参数:
+        func: 接收游标的函数，在一个事务中执行
+
+    返回:
+        func 的返回值（异常会原样抛出给调用方）
+    """
+    if _holds_writer():
+        return _write_job(func)
+    return _get_writer().submit(_write_job, func).result()
+
+
+def execute_write(func):
+    """
+    在写线程中以一个事务执行自定义写操作
+
+    参数:
+        func: 接收游标的函数，成功时提交，抛出异常时回滚
+
+    返回:
+        func 的返回值（异常会原样抛出给调用方）
+
+    使用示例:
+        execute_write(lambda cursor: cursor.execute(
+            "UPDATE monitor_tasks SET triggered_count = triggered_count + 1 WHERE id = ?", [task_id]
+        ))
+    """
+    return _run_write(func)
+
+
+def _hold_writer(ready, release):
+    """在写线程中占位，直到 get_db_transaction 的事务结束"""
+    ready.set()
+    release.wait()
+
+
+def _close_writer():
+    """进程退出时等待排队的写操作完成并关闭写连接"""
+    global _writer_conn
+    if _writer is not None:
+        _writer.shutdown(wait=True)
+    if _writer_conn is not None:
+        _writer_conn.close()
+        _writer_conn = None
 
 
 def execute_insert(table_name, data):
@@ -463,15 +711,12 @@ def execute_insert(table_name, data):
     返回:
         插入的行ID
     """
-    columns = ', '.join(data.keys())
-    placeholders = ', '.join(['?' for _ in data])
-    sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+    _check_table_name(table_name)
+    columns = tuple(sorted(data))
+    sql = _insert_sql(table_name, columns)
 
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, tuple(data.values()))
-        conn.commit()
-        return cursor.lastrowid
+    params = [data[col] for col in columns]
+    return _run_write(lambda cursor: cursor.execute(sql, params).lastrowid)
 
 
 def execute_update(table_name, data, where_clause, where_params=None):
@@ -487,18 +732,15 @@ def execute_update(table_name, data, where_clause, where_params=None):
     返回:
         影响的行数
     """
-    set_clause = ', '.join([f"{k} = ?" for k in data.keys()])
-    sql = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
+    _check_table_name(table_name)
+    columns = tuple(sorted(data))
+    sql = _update_sql(table_name, columns, where_clause)
 
-    params = tuple(data.values())
+    params = tuple(data[col] for col in columns)
     if where_params:
         params += tuple(where_params)
 
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, params)
-        conn.commit()
-        return cursor.rowcount
+    return _run_write(lambda cursor: cursor.execute(sql, params).rowcount)
 
 
 def execute_delete(table_name, where_clause, where_params=None):
@@ -513,16 +755,11 @@ def execute_delete(table_name, where_clause, where_params=None):
     返回:
         删除的行数
     """
-    sql = f"DELETE FROM {table_name} WHERE {where_clause}"
+    _check_table_name(table_name)
+    sql = _delete_sql(table_name, where_clause)
 
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        if where_params:
-            cursor.execute(sql, where_params)
-        else:
-            cursor.execute(sql)
-        conn.commit()
-        return cursor.rowcount
+    params = where_params or ()
+    return _run_write(lambda cursor: cursor.execute(sql, params).rowcount)
 
 
 # ============ 数据库状态检查 ============
@@ -548,24 +785,32 @@ def get_db_info():
     }
 
     if info['db_exists']:
-        with get_db_connection() as conn:
+        with get_db_connection(row_factory=False) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
             tables = cursor.fetchall()
             info['table_count'] = len(tables)
-            info['tables'] = [t['name'] for t in tables]
+            info['tables'] = [t[0] for t in tables]
 
-            # 获取每个表的记录数
-            for table in info['tables']:
-                cursor.execute(f"SELECT COUNT(*) as count FROM {table}")
-                count = cursor.fetchone()['count']
-                info[f'{table}_count'] = count
+            # 一条 UNION ALL 语句取回所有表的记录数
+            if info['tables']:
+                count_sql = ' UNION ALL '.join(
+                    f"SELECT '{table}' AS name, COUNT(*) AS count FROM \"{table}\""
+                    for table in info['tables']
+                )
+                for name, count in cursor.execute(count_sql):
+                    info[f'{name}_count'] = count
 
     return info
 
 
 # ============ 批量操作优化 ============
 
+# 多行 INSERT 每条语句的最大行数，以及单条语句的绑定变量上限（兼容旧版 SQLite 的 999）
+INSERT_CHUNK_ROWS = 64
+MAX_SQL_VARIABLES = 999
+
+
 def execute_batch_insert(table_name, data_list):
     """
     批量插入数据（性能优化）
@@ -580,16 +825,25 @@ def execute_batch_insert(table_name, data_list):
     if not data_list:
         return 0
 
-    columns = ', '.join(data_list[0].keys())
-    placeholders = ', '.join(['?' for _ in data_list[0]])
-    sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+    _check_table_name(table_name)
+    columns = tuple(sorted(data_list[0]))
 
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        # 使用executemany进行批量插入
-        cursor.executemany(sql, [tuple(d.values()) for d in data_list])
-        conn.commit()
-        return cursor.rowcount
+    # 每条 INSERT 携带多行 VALUES，绑定变量总数不超过 SQLite 的上限
+    chunk_size = max(1, min(INSERT_CHUNK_ROWS, MAX_SQL_VARIABLES // len(columns)))
+    chunk_sql = _insert_sql(table_name, columns, chunk_size)
+
+    def insert_chunks(cursor):
+        inserted_count = 0
+        for start in range(0, len(data_list), chunk_size):
+            chunk = data_list[start:start + chunk_size]
+            # 最后不足一批的剩余行使用较短的语句
+            sql = chunk_sql if len(chunk) == chunk_size else _insert_sql(table_name, columns, len(chunk))
+            cursor.execute(sql, [data[col] for data in chunk for col in columns])
+            inserted_count += cursor.rowcount
+        return inserted_count
+
+    # 整批在写线程的一个事务中完成
+    return _run_write(insert_chunks)
 
 
 def execute_batch_update(table_name, data_list, key_column):
@@ -608,37 +862,50 @@ def execute_batch_update(table_name, data_list, key_column):
         return 0
 
     # 构建UPDATE语句
-    first_item = data_list[0]
-    update_columns = [k for k in first_item.keys() if k != key_column]
-    set_clause = ', '.join([f"{col} = ?" for col in update_columns])
-    sql = f"UPDATE {table_name} SET {set_clause} WHERE {key_column} = ?"
+    _check_table_name(table_name)
+    update_columns = tuple(sorted(k for k in data_list[0] if k != key_column))
+    sql = _update_sql(table_name, update_columns, f"{key_column} = ?")
 
-    updated_count = 0
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        for data in data_list:
-            # 准备参数值
-            values = [data[col] for col in update_columns]
-            values.append(data[key_column])
-            cursor.execute(sql, tuple(values))
-            updated_count += cursor.rowcount
-        conn.commit()
+    # 参数按需生成，整批在写线程的一个事务中用 executemany 执行
+    params = (
+        [data[col] for col in update_columns] + [data[key_column]]
+        for data in data_list
+    )
 
-    return updated_count
+    return _run_write(lambda cursor: cursor.executemany(sql, params).rowcount)
 
 
 # ============ 数据清理优化 ============
 
-def vacuum_database():
+# 空闲页占比低于该阈值时跳过整理
+VACUUM_FRAGMENTATION_THRESHOLD = 0.2
+
+
+def vacuum_database(min_fragmentation=VACUUM_FRAGMENTATION_THRESHOLD):
     """
     优化数据库（清理碎片，减小文件大小）
 
+    空闲页占比未超过 min_fragmentation 时直接返回；
+    库启用了 auto_vacuum=INCREMENTAL 时只回收空闲页，否则执行完整的 VACUUM
+
+    参数:
+        min_fragmentation: 触发整理的空闲页占比，传 0 强制整理
+
     返回:
         操作是否成功
     """
     try:
-        with get_db_connection() as conn:
-            conn.execute("VACUUM")
+        with get_db_connection(row_factory=False) as conn:
+            freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            if not page_count or freelist_count / page_count < min_fragmentation:
+                return True
+
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                # executescript 会把 PRAGMA 执行到底，逐页回收全部空闲页
+                conn.executescript("PRAGMA incremental_vacuum;")
+            else:
+                conn.execute("VACUUM")
             conn.commit()
         return True
     except Exception as e:
@@ -670,6 +937,67 @@ def analyze_database():
         return False
 
 
+# ============ 后台维护 ============
+
+_maintenance_thread = None
+_maintenance_lock = threading.Lock()
+
+
+def maintenance_tick():
+    """
+    执行一次数据库例行维护：截断 WAL 文件，并在需要时更新统计信息
+
+    返回:
+        操作是否成功
+    """
+    try:
+        with get_db_connection(row_factory=False) as conn:
+            # 把 WAL 中的内容写回主库并截断，避免 -wal 文件持续增长
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+            # 从未分析过时先做一次完整 ANALYZE，之后交给 PRAGMA optimize 按需更新
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            ).fetchone()
+            if not has_stats:
+                conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+        return True
+    except Exception as e:
+        print(f"数据库维护失败: {e}")
+        return False
+
+
+def start_db_maintenance(interval=None):
+    """
+    启动后台维护线程，每隔 interval 秒执行一次 maintenance_tick（重复调用只会启动一个线程）
+
+    参数:
+        interval: 维护间隔（秒），默认使用 config.DB_MAINTENANCE_INTERVAL；小于等于0时不启动
+    """
+    global _maintenance_thread
+
+    if interval is None:
+        interval = config.DB_MAINTENANCE_INTERVAL
+
+    # 间隔为0或负数视为关闭后台维护，避免线程无休眠地连续执行 maintenance_tick
+    if interval <= 0:
+        return
+
+    with _maintenance_lock:
+        if _maintenance_thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                maintenance_tick()
+
+        _maintenance_thread = threading.Thread(target=run, name='db-maintenance', daemon=True)
+        _maintenance_thread.start()
+
+
 # ============ 数据库备份 ============
 
 def backup_database(backup_path=None):
@@ -682,10 +1010,6 @@ def backup_database(backup_path=None):
     返回:
         备份文件路径或None（失败时）
     """
-    import os
-    import shutil
-    from datetime import datetime
-
     if not check_db_exists():
         return None
 
@@ -697,7 +1021,14 @@ def backup_database(backup_path=None):
         backup_path = os.path.join(backup_dir, f'stock_data_backup_{timestamp}.db')
 
     try:
-        shutil.copy2(config.DB_PATH, backup_path)
+        # 使用 SQLite 在线备份 API，开启 WAL 时也能得到一致的快照
+        with get_db_connection() as src:
+            src.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            dst = sqlite3.connect(backup_path)
+            try:
+                src.backup(dst, pages=1000, sleep=0.01)
+            finally:
+                dst.close()
         return backup_path
     except Exception as e:
         print(f"数据库备份失败: {e}")
@@ -707,10 +1038,13 @@ def backup_database(backup_path=None):
 # ============ 事务管理 ============
 
 @contextmanager
-def get_db_transaction():
+def get_db_transaction(row_factory=True):
     """
     获取数据库事务（上下文管理器）
 
+    参数:
+        row_factory: 是否以 sqlite3.Row 返回结果，纯写入的事务传 False
+
     使用示例:
         with get_db_transaction() as (conn, cursor):
             cursor.execute("INSERT INTO ...")
@@ -718,16 +1052,35 @@ def get_db_transaction():
             # 如果发生异常，自动回滚
             # 否则自动提交
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if _holds_writer():
+        # 已在写连接的事务中（嵌套调用），直接加入外层事务
+        conn = _get_writer_conn()
+        yield conn, conn.cursor()
+        return
+
+    # 在写线程中排队占位，轮到时由当前线程独占写连接，和其他写操作按提交顺序串行
+    ready = threading.Event()
+    release = threading.Event()
+    hold = _get_writer().submit(_hold_writer, ready, release)
+    ready.wait()
+
+    _writer_state.holding = True
+    conn = _get_writer_conn()
+    conn.row_factory = sqlite3.Row if row_factory else None
     try:
-        yield conn, cursor
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+        try:
+            yield conn, cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
     finally:
-        conn.close()
+        conn.row_factory = None
+        _writer_state.holding = False
+        release.set()
+        hold.result()
 
 
 # ============ 查询性能优化 ============
@@ -745,30 +1098,25 @@ def execute_query_paginated(sql, params=None, page=1, page_size=100):
     返回:
         (记录列表, 总页数, 总记录数)
     """
-    # 计算总数
     count_sql = f"SELECT COUNT(*) as total FROM ({sql}) as subquery"
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(count_sql, params)
-        else:
-            cursor.execute(count_sql)
-        total = cursor.fetchone()['total']
-
-    # 计算总页数
-    total_pages = (total + page_size - 1) // page_size if total > 0 else 0
-
-    # 执行分页查询
     offset = (page - 1) * page_size
     paginated_sql = f"{sql} LIMIT {page_size} OFFSET {offset}"
+    query_params = params or ()
 
+    # 总数和分页数据在同一连接、同一读事务中查询，保证两者来自同一快照
     with get_db_connection() as conn:
+        conn.execute("BEGIN")
         cursor = conn.cursor()
-        if params:
-            cursor.execute(paginated_sql, params)
-        else:
-            cursor.execute(paginated_sql)
-        records = cursor.fetchall()
+
+        # 计算总数
+        total = cursor.execute(count_sql, query_params).fetchone()[0]
+
+        # 执行分页查询
+        records = cursor.execute(paginated_sql, query_params).fetchall()
+        conn.commit()
+
+    # 计算总页数
+    total_pages = (total + page_size - 1) // page_size if total > 0 else 0
 
     return records, total_pages, total
 
@@ -809,29 +1157,18 @@ def check_data_integrity():
         result['issues'].append('数据库文件不存在')
         return result
 
-    with get_db_connection() as conn:
+    with get_db_connection(row_factory=False) as conn:
         cursor = conn.cursor()
 
-        # 检查是否有重复数据
-        cursor.execute("""
-            SELECT ts_code, trade_date, COUNT(*) as count
-            FROM stock_daily_history
-            GROUP BY ts_code, trade_date
-            HAVING count > 1
-        """)
-        duplicates = cursor.fetchall()
-        if duplicates:
-            result['status'] = 'WARNING'
-            result['issues'].append(f'发现{len(duplicates)}条重复的日线数据')
+        # 重复数据由主键 (ts_code, trade_date) 保证不会出现，无需全表分组检查
 
-        # 检查数据缺失
+        # 检查数据缺失（只需探测是否存在任意一行）
         cursor.execute("""
-            SELECT COUNT(DISTINCT ts_code) as stock_count
-            FROM stock_daily_history
+            SELECT EXISTS (SELECT 1 FROM stock_daily_history) as has_data
         """)
-        stock_count = cursor.fetchone()['stock_count']
+        has_data = cursor.fetchone()[0]
 
-        if stock_count == 0:
+        if not has_data:
             result['status'] = 'WARNING'
             result['issues'].append('股票日线数据为空')
 
@@ -852,56 +1189,63 @@ def get_data_statistics():
     if not check_db_exists():
         return stats
 
-    with get_db_connection() as conn:
+    with get_db_connection(row_factory=False) as conn:
         cursor = conn.cursor()
 
-        # 日线数据统计
-        cursor.execute("""
-            SELECT
-                COUNT(DISTINCT ts_code) as stock_count,
-                COUNT(*) as record_count,
-                MIN(trade_date) as min_date,
-                MAX(trade_date) as max_date
-            FROM stock_daily_history
-        """)
-        daily_stats = cursor.fetchone()
-        stats['daily'] = dict(daily_stats) if daily_stats else {}
-
-        # 指标数据统计
+        # 日线与指标数据统计：两个单行聚合交叉连接，一次取回
         cursor.execute("""
             SELECT
-                COUNT(DISTINCT ts_code) as stock_count,
-                COUNT(*) as record_count,
-                MIN(trade_date) as min_date,
-                MAX(trade_date) as max_date
-            FROM stock_indicators
-            WHERE frequency = 'd'
+                d.stock_count AS daily_stock_count,
+                d.record_count AS daily_record_count,
+                d.min_date AS daily_min_date,
+                d.max_date AS daily_max_date,
+                i.stock_count AS indicators_stock_count,
+                i.record_count AS indicators_record_count,
+                i.min_date AS indicators_min_date,
+                i.max_date AS indicators_max_date
+            FROM (
+                SELECT
+                    COUNT(DISTINCT ts_code) as stock_count,
+                    COUNT(*) as record_count,
+                    MIN(trade_date) as min_date,
+                    MAX(trade_date) as max_date
+                FROM stock_daily_history
+            ) d, (
+                SELECT
+                    COUNT(DISTINCT ts_code) as stock_count,
+                    COUNT(*) as record_count,
+                    MIN(trade_date) as min_date,
+                    MAX(trade_date) as max_date
+                FROM stock_indicators
+                WHERE frequency = 'd'
+            ) i
         """)
-        indicator_stats = cursor.fetchone()
-        stats['indicators'] = dict(indicator_stats) if indicator_stats else {}
-
-        # 股票池统计
+        columns = [desc[0] for desc in cursor.description]
+        row = dict(zip(columns, cursor.fetchone()))
+        for prefix in ('daily', 'indicators'):
+            stats[prefix] = {
+                key[len(prefix) + 1:]: value
+                for key, value in row.items() if key.startswith(prefix + '_')
+            }
+
+        # 股票池与策略分组统计合并为一条 UNION ALL 查询
         cursor.execute("""
-            SELECT
-                pool_name,
-                COUNT(*) as count
+            SELECT 'pool' as kind, pool_name as name, COUNT(*) as count
             FROM stock_pool
             GROUP BY pool_name
-        """)
-        pool_stats = cursor.fetchall()
-        stats['pools'] = {s['pool_name']: s['count'] for s in pool_stats}
-
-        # 策略统计
-        cursor.execute("""
-            SELECT
-                strategy_type,
-                COUNT(*) as count
+            UNION ALL
+            SELECT 'strategy', strategy_type, COUNT(*)
             FROM user_strategies
             WHERE is_active = 1
             GROUP BY strategy_type
         """)
-        strategy_stats = cursor.fetchall()
-        stats['strategies'] = {s['strategy_type'] or '未分类': s['count'] for s in strategy_stats}
+        stats['pools'] = {}
+        stats['strategies'] = {}
+        for kind, name, count in cursor.fetchall():
+            if kind == 'pool':
+                stats['pools'][name] = count
+            else:
+                stats['strategies'][name or '未分类'] = count
 
     return stats
 
@@ -5,86 +5,106 @@
 """
 
 import sqlite3
-import config
+from utils.db_helper import get_db_connection
+
+# 扩展技术指标字段 (列名, 类型)
+EXTENDED_INDICATOR_COLUMNS = [
+    # 历史高低点
+    ("max_high_5d", "REAL"),
+    ("max_high_10d", "REAL"),
+    ("max_high_20d", "REAL"),
+    ("max_high_60d", "REAL"),
+    ("max_low_5d", "REAL"),
+    ("max_low_10d", "REAL"),
+    ("max_low_20d", "REAL"),
+    ("max_low_60d", "REAL"),
+
+    # 前一日数据
+    ("prev_close", "REAL"),
+    ("prev_high", "REAL"),
+    ("prev_low", "REAL"),
+    ("prev_volume", "REAL"),
+    ("prev_change_pct", "REAL"),
+
+    # 连续统计
+    ("consecutive_up_days", "INTEGER"),
+    ("consecutive_down_days", "INTEGER"),
+
+    # K线形态
+    ("body", "REAL"),
+    ("body_ratio", "REAL"),
+    ("upper_shadow", "REAL"),
+    ("lower_shadow", "REAL"),
+    ("upper_shadow_ratio", "REAL"),
+    ("lower_shadow_ratio", "REAL"),
+
+    # 位置指标
+    ("position_20d", "REAL"),
+    ("position_60d", "REAL"),
+]
+
+# 扩展指标迁移完成后写入 PRAGMA user_version 的版本号
+EXTENDED_INDICATORS_VERSION = 1
+
+
+def _get_user_version(conn):
+    """读取数据库的 user_version（迁移标记）"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
 
 
 def migrate_add_extended_indicators():
     """
     添加扩展技术指标字段到 stock_indicators 表
 
+    所有 ALTER TABLE 在同一个事务中执行，成功后写入 user_version，
+    再次运行时直接跳过
+
     返回:
         bool: 是否成功
     """
     print("正在添加扩展技术指标字段...")
 
     try:
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        # 检查表是否存在
-        cursor.execute("""
-            SELECT name FROM sqlite_master
-            WHERE type='table' AND name='stock_indicators'
-        """)
-        if not cursor.fetchone():
-            print("❌ stock_indicators 表不存在，请先初始化数据库")
-            return False
-
-        # 获取现有列
-        cursor.execute("PRAGMA table_info(stock_indicators)")
-        existing_columns = {row[1] for row in cursor.fetchall()}
-
-        # 定义需要添加的新列
-        new_columns = [
-            # 历史高低点
-            ("max_high_5d", "REAL"),
-            ("max_high_10d", "REAL"),
-            ("max_high_20d", "REAL"),
-            ("max_high_60d", "REAL"),
-            ("max_low_5d", "REAL"),
-            ("max_low_10d", "REAL"),
-            ("max_low_20d", "REAL"),
-            ("max_low_60d", "REAL"),
-
-            # 前一日数据
-            ("prev_close", "REAL"),
-            ("prev_high", "REAL"),
-            ("prev_low", "REAL"),
-            ("prev_volume", "REAL"),
-            ("prev_change_pct", "REAL"),
-
-            # 连续统计
-            ("consecutive_up_days", "INTEGER"),
-            ("consecutive_down_days", "INTEGER"),
-
-            # K线形态
-            ("body", "REAL"),
-            ("body_ratio", "REAL"),
-            ("upper_shadow", "REAL"),
-            ("lower_shadow", "REAL"),
-            ("upper_shadow_ratio", "REAL"),
-            ("lower_shadow_ratio", "REAL"),
-
-            # 位置指标
-            ("position_20d", "REAL"),
-            ("position_60d", "REAL"),
-        ]
-
-        # 添加不存在的列
-        added_count = 0
-        for col_name, col_type in new_columns:
-            if col_name not in existing_columns:
-                try:
-                    cursor.execute(f"ALTER TABLE stock_indicators ADD COLUMN {col_name} {col_type}")
-                    print(f"  ✅ 添加列: {col_name}")
-                    added_count += 1
-                except Exception as e:
-                    print(f"  ❌ 添加列失败 {col_name}: {e}")
-            else:
-                print(f"  ℹ️  列已存在: {col_name}")
-
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            if _get_user_version(conn) >= EXTENDED_INDICATORS_VERSION:
+                print("ℹ️  扩展指标字段已迁移，跳过")
+                return True
+
+            cursor = conn.cursor()
+
+            # 检查表是否存在
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE type='table' AND name='stock_indicators'
+            """)
+            if not cursor.fetchone():
+                print("❌ stock_indicators 表不存在，请先初始化数据库")
+                return False
+
+            # 获取现有列（只查询一次）
+            cursor.execute("PRAGMA table_info(stock_indicators)")
+            existing_columns = {row[1] for row in cursor.fetchall()}
+
+            # 在一个事务中添加不存在的列
+            cursor.execute("BEGIN")
+            added_count = 0
+            failed_count = 0
+            for col_name, col_type in EXTENDED_INDICATOR_COLUMNS:
+                if col_name not in existing_columns:
+                    try:
+                        cursor.execute(f"ALTER TABLE stock_indicators ADD COLUMN {col_name} {col_type}")
+                        print(f"  ✅ 添加列: {col_name}")
+                        added_count += 1
+                    except Exception as e:
+                        print(f"  ❌ 添加列失败 {col_name}: {e}")
+                        failed_count += 1
+                else:
+                    print(f"  ℹ️  列已存在: {col_name}")
+
+            # 全部列就绪后才写入迁移标记
+            if not failed_count:
+                cursor.execute(f"PRAGMA user_version = {EXTENDED_INDICATORS_VERSION}")
+            conn.commit()
 
         print(f"\n✅ 迁移完成！共添加 {added_count} 个新列")
         return True
@@ -94,6 +114,45 @@ def migrate_add_extended_indicators():
         return False
 
 
+def migrate_add_strategy_indexes():
+    """
+    为 user_strategies 添加索引:
+    - (user_id, created_at DESC): 按用户列出策略
+    - (user_id, strategy_name) 唯一索引: 同一用户下策略名不可重复
+
+    返回:
+        bool: 是否成功
+    """
+    print("正在添加策略表索引...")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_strategies_user_created
+                ON user_strategies(user_id, created_at DESC)
+            """)
+
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_user_strategy_name
+                ON user_strategies(user_id, strategy_name)
+            """)
+
+            conn.commit()
+
+        print("✅ 策略表索引已就绪")
+        return True
+
+    except sqlite3.IntegrityError as e:
+        print(f"❌ 存在重复的策略名称，请先清理后再迁移: {e}")
+        return False
+
+    except Exception as e:
+        print(f"❌ 迁移失败: {e}")
+        return False
+
+
 def check_migration_status():
     """
     检查扩展指标字段的迁移状态
@@ -101,24 +160,16 @@ def check_migration_status():
     返回:
         dict: 迁移状态信息
     """
-    required_columns = [
-        "max_high_5d", "max_high_10d", "max_high_20d", "max_high_60d",
-        "max_low_5d", "max_low_10d", "max_low_20d", "max_low_60d",
-        "prev_close", "prev_high", "prev_low", "prev_volume", "prev_change_pct",
-        "consecutive_up_days", "consecutive_down_days",
-        "body", "body_ratio", "upper_shadow", "lower_shadow",
-        "upper_shadow_ratio", "lower_shadow_ratio",
-        "position_20d", "position_60d"
-    ]
+    required_columns = [col_name for col_name, _ in EXTENDED_INDICATOR_COLUMNS]
 
     try:
-        conn = sqlite3.connect(config.DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("PRAGMA table_info(stock_indicators)")
-        existing_columns = {row[1] for row in cursor.fetchall()}
-
-        conn.close()
+        with get_db_connection() as conn:
+            # 已写入迁移标记时无需再逐列检查
+            if _get_user_version(conn) >= EXTENDED_INDICATORS_VERSION:
+                existing_columns = set(required_columns)
+            else:
+                cursor = conn.execute("PRAGMA table_info(stock_indicators)")
+                existing_columns = {row[1] for row in cursor.fetchall()}
 
         missing = [col for col in required_columns if col not in existing_columns]
 
@@ -165,4 +216,7 @@ if __name__ == "__main__":
     else:
         print("\n❌ 迁移失败")
 
+    print("\n4. 添加策略表索引...")
+    migrate_add_strategy_indexes()
+
     print("\n" + "=" * 60)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite连接池
+复用数据库连接，避免每次操作都重新建立连接并丢失页缓存
+"""
+
+import atexit
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import config
+
+# 每个连接缓存的预编译语句数量（sqlite3 默认 128）
+STATEMENT_CACHE_SIZE = 256
+
+# 每个连接都要设置的PRAGMA（journal_mode 写入文件头，每个进程只需设置一次）
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+_wal_enabled = False
+
+
+def configure_connection(conn):
+    """
+    设置连接的PRAGMA：WAL模式下读写互不阻塞，synchronous=NORMAL 减少提交时的fsync
+
+    参数:
+        conn: 数据库连接
+    """
+    global _wal_enabled
+    if not _wal_enabled:
+        # 仅对尚未建表的新库生效，必须在切换 WAL 之前设置，之后可用 incremental_vacuum 回收空闲页
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+
+class ConnectionPool:
+    """
+    基于队列的SQLite连接池
+
+    特点:
+    - 预先创建 min_size 个连接，按需扩展到 max_size 个
+    - 连接可跨线程复用（同一时刻只被一个线程持有）
+    - 归还时回滚未提交的事务，保证下一个使用者拿到干净的连接
+    """
+
+    def __init__(self, db_path, min_size=2, max_size=10, timeout=30):
+        """
+        初始化连接池
+
+        参数:
+            db_path: 数据库文件路径
+            min_size: 预先创建的连接数
+            max_size: 最大连接数
+            timeout: 连接耗尽时等待归还的秒数
+        """
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=max_size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+        for _ in range(min_size):
+            self._pool.put(self._create_connection())
+
+    def _create_connection(self):
+        """创建新连接并设置PRAGMA（每个连接只执行一次）"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        configure_connection(conn)
+        self._created += 1
+        return conn
+
+    def acquire(self):
+        """从池中取出一个连接，池空且未达上限时新建"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                return self._create_connection()
+
+        try:
+            return self._pool.get(timeout=self.timeout)
+        except queue.Empty:
+            # 转为带说明的数据库错误，调用方按普通数据库异常处理和提示
+            raise sqlite3.OperationalError(
+                f"数据库连接池已耗尽（{self.max_size} 个连接均被占用，等待 {self.timeout} 秒后超时）"
+            ) from None
+
+    def release(self, conn):
+        """归还连接到池中（回滚未提交的事务并恢复默认的 row_factory）"""
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        借用一个连接（上下文管理器）
+
+        使用示例:
+            with pool.connection() as conn:
+                conn.execute("SELECT ...")
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """关闭池中所有空闲连接"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+# ============ 全局连接池 ============
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """获取进程级连接池（首次调用时创建）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    config.DB_PATH,
+                    min_size=config.DB_POOL_MIN_SIZE,
+                    max_size=config.DB_POOL_MAX_SIZE
+                )
+                atexit.register(close_pool)
+    return _pool
+
+
+def close_pool():
+    """关闭全局连接池中的所有空闲连接（进程退出时自动调用）"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
+
+@contextmanager
+def get_pooled_connection():
+    """
+    从全局连接池借用连接（上下文管理器）
+
+    使用示例:
+        with get_pooled_connection() as conn:
+            conn.execute("UPDATE ...")
+            conn.commit()
+    """
+    with get_pool().connection() as conn:
+        yield conn
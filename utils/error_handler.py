@@ -7,30 +7,95 @@
 import streamlit as st
 import traceback
 import sys
+import os
+import atexit
+import queue
+import random
+import time
 from typing import Callable, Any, Optional
 from functools import wraps
+from contextlib import contextmanager
 import logging
+import logging.handlers
 from datetime import datetime
 
 
 # ============ 日志配置 ============
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 日志文件按批写入：累计 LOG_BATCH_SIZE 条（或出现 ERROR 及以上级别的记录）时统一写盘
+LOG_BATCH_SIZE = 512
+LOG_BUFFER_SIZE = 64 * 1024
+
+_log_listener = None
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """写入 64KB 缓冲区而不逐条 flush，由 _BatchMemoryHandler 每批写完后统一刷新"""
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                    encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchMemoryHandler(logging.handlers.MemoryHandler):
+    """批量转发日志记录，转发完成后只 flush 一次目标文件"""
+
+    def flush(self):
+        super().flush()
+        if self.target:
+            self.target.flush()
+
+
 def setup_logging():
-    """配置日志系统"""
+    """
+    配置日志系统
+
+    调用方只把日志记录放入队列，写文件和输出到控制台由后台监听线程完成，
+    不占用 Streamlit 处理请求的线程
+    """
+    global _log_listener
+
     log_dir = "logs"
-    import os
     os.makedirs(log_dir, exist_ok=True)
 
     log_file = os.path.join(log_dir, "app.log")
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    if _log_listener is None:
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = _BufferedFileHandler(log_file, encoding='utf-8', delay=True)
+        stream_handler = logging.StreamHandler(sys.stdout)
+        for handler in (file_handler, stream_handler):
+            handler.setFormatter(formatter)
+
+        # 进程退出时 logging.shutdown 会关闭该处理器并写出剩余记录
+        batch_handler = _BatchMemoryHandler(
+            capacity=LOG_BATCH_SIZE,
+            flushLevel=logging.ERROR,
+            target=file_handler,
+            flushOnClose=True
+        )
+
+        # 入队前只合并消息和异常堆栈，时间、级别等由监听线程中的处理器统一格式化
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+
+        _log_listener = logging.handlers.QueueListener(
+            log_queue, batch_handler, stream_handler, respect_handler_level=True
+        )
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
 
     return logging.getLogger(__name__)
 
@@ -54,12 +119,13 @@ class AppError(Exception):
         self.message = message
         self.user_message = user_message or message
         self.details = details
-        self.timestamp = datetime.now()
+        self._created_at = time.time()
+        # 日志由捕获该错误的处理器（handle_errors / safe_execute 等）统一记录一次
 
-        # 记录错误日志
-        logger.error(f"{self.__class__.__name__}: {message}")
-        if details:
-            logger.error(f"Details: {details}")
+    @property
+    def timestamp(self) -> datetime:
+        """错误发生时间（访问时才构造 datetime 对象）"""
+        return datetime.fromtimestamp(self._created_at)
 
 
 class DatabaseError(AppError):
@@ -137,7 +203,9 @@ def handle_errors(
                 if show_traceback and e.details:
                     with st.expander("查看详细信息"):
                         st.code(e.details)
-                logger.error(f"AppError in {func.__name__}: {e.message}")
+                logger.error("AppError in %s: %s", func.__name__, e.message)
+                if e.details:
+                    logger.error("Details: %s", e.details)
                 return default_return
             except Exception as e:
                 # 未知错误
@@ -145,8 +213,9 @@ def handle_errors(
                 if show_traceback:
                     with st.expander("查看错误详情"):
                         st.code(traceback.format_exc())
-                logger.error(f"Unexpected error in {func.__name__}: {str(e)}")
-                logger.error(traceback.format_exc())
+                # 交给 logging 处理 exc_info，不再额外调用 traceback.format_exc()；
+                # 注意 QueueHandler 入队前仍会在当前线程格式化堆栈
+                logger.error("Unexpected error in %s: %s", func.__name__, e, exc_info=True)
                 if raise_error:
                     raise
                 return default_return
@@ -189,95 +258,109 @@ def safe_execute(
     except AppError as e:
         if show_error:
             st.error(f"❌ {e.user_message}")
-        logger.error(f"AppError in safe_execute: {e.message}")
+        logger.error("AppError in safe_execute: %s", e.message)
+        if e.details:
+            logger.error("Details: %s", e.details)
         return default_return
     except Exception as e:
         if show_error:
             st.error(f"❌ {error_message}")
-        logger.error(f"Error in safe_execute: {str(e)}")
+        logger.error("Error in safe_execute: %s", e)
         return default_return
 
 
 # ============ 用户友好的错误提示 ============
 
+# 各类错误的排查说明（静态文本，模块加载时构造一次）
+_DB_ERROR_MD = """
+**可能的原因:**
+- 数据库文件被锁定
+- 磁盘空间不足
+- 数据库文件损坏
+
+**解决方法:**
+1. 关闭其他应用实例
+2. 检查磁盘空间
+3. 如数据库损坏，删除后重新初始化
+"""
+
+_NETWORK_ERROR_MD = """
+**可能的原因:**
+- 网络连接中断
+- baostock服务不可用
+- 防火墙阻止连接
+
+**解决方法:**
+1. 检查网络连接
+2. 稍后重试
+3. 避开网络高峰时段
+"""
+
+_DATA_ERROR_MD = """
+**可能的原因:**
+- 股票代码格式不正确
+- 数据不完整
+- 数据格式错误
+
+**解决方法:**
+1. 检查股票代码格式（如：600519.SH）
+2. 重新下载数据
+3. 检查数据完整性
+"""
+
+_VALIDATION_ERROR_MD = """
+**请检查:**
+- 股票代码格式是否正确
+- 日期范围是否合理
+- 参数值是否在有效范围内
+"""
+
+_EXTERNAL_API_ERROR_MD = """
+**可能的原因:**
+- baostock服务暂时不可用
+- 请求过于频繁
+- 服务维护中
+
+**解决方法:**
+1. 稍后重试
+2. 减少请求频率
+3. 避开高峰时段（9:30-15:00）
+"""
+
+
+def _render_error_card(title: str, guide_md: str):
+    """在同一个错误提示框中显示标题和排查说明"""
+    st.error(f"**{title}**\n{guide_md}", icon="❌")
+
+
 def show_database_error(error: Exception):
     """显示数据库错误"""
-    st.error("❌ 数据库错误")
-    st.markdown("""
-    **可能的原因:**
-    - 数据库文件被锁定
-    - 磁盘空间不足
-    - 数据库文件损坏
-
-    **解决方法:**
-    1. 关闭其他应用实例
-    2. 检查磁盘空间
-    3. 如数据库损坏，删除后重新初始化
-    """)
-    logger.error(f"Database error: {str(error)}")
+    _render_error_card("数据库错误", _DB_ERROR_MD)
+    logger.error("Database error: %s", error)
 
 
 def show_network_error(error: Exception):
     """显示网络错误"""
-    st.error("❌ 网络连接失败")
-    st.markdown("""
-    **可能的原因:**
-    - 网络连接中断
-    - baostock服务不可用
-    - 防火墙阻止连接
-
-    **解决方法:**
-    1. 检查网络连接
-    2. 稍后重试
-    3. 避开网络高峰时段
-    """)
-    logger.error(f"Network error: {str(error)}")
+    _render_error_card("网络连接失败", _NETWORK_ERROR_MD)
+    logger.error("Network error: %s", error)
 
 
 def show_data_error(error: Exception):
     """显示数据错误"""
-    st.error("❌ 数据错误")
-    st.markdown("""
-    **可能的原因:**
-    - 股票代码格式不正确
-    - 数据不完整
-    - 数据格式错误
-
-    **解决方法:**
-    1. 检查股票代码格式（如：600519.SH）
-    2. 重新下载数据
-    3. 检查数据完整性
-    """)
-    logger.error(f"Data error: {str(error)}")
+    _render_error_card("数据错误", _DATA_ERROR_MD)
+    logger.error("Data error: %s", error)
 
 
 def show_validation_error(error: Exception):
     """显示验证错误"""
-    st.error("❌ 输入验证失败")
-    st.markdown("""
-    **请检查:**
-    - 股票代码格式是否正确
-    - 日期范围是否合理
-    - 参数值是否在有效范围内
-    """)
-    logger.error(f"Validation error: {str(error)}")
+    _render_error_card("输入验证失败", _VALIDATION_ERROR_MD)
+    logger.error("Validation error: %s", error)
 
 
 def show_external_api_error(error: Exception):
     """显示外部API错误"""
-    st.error("❌ 数据服务连接失败")
-    st.markdown("""
-    **可能的原因:**
-    - baostock服务暂时不可用
-    - 请求过于频繁
-    - 服务维护中
-
-    **解决方法:**
-    1. 稍后重试
-    2. 减少请求频率
-    3. 避开高峰时段（9:30-15:00）
-    """)
-    logger.error(f"External API error: {str(error)}")
+    _render_error_card("数据服务连接失败", _EXTERNAL_API_ERROR_MD)
+    logger.error("External API error: %s", error)
 
 
 # ============ 错误映射表 ============
@@ -298,17 +381,21 @@ def show_error(error: Exception):
     参数:
         error: 错误对象
     """
-    error_type = type(error)
-
-    # 查找匹配的错误处理器
-    for error_class, handler in ERROR_HANDLERS.items():
-        if isinstance(error, error_class):
-            handler(error)
-            return
+    # 先按精确类型查表，找不到时再按子类匹配
+    handler = ERROR_HANDLERS.get(type(error))
+    if handler is None:
+        for error_class, class_handler in ERROR_HANDLERS.items():
+            if isinstance(error, error_class):
+                handler = class_handler
+                break
+
+    if handler is not None:
+        handler(error)
+        return
 
     # 默认错误处理
     st.error(f"❌ 发生错误: {str(error)}")
-    logger.error(f"Unhandled error: {str(error)}")
+    logger.error("Unhandled error: %s", error)
 
 
 # ============ 确认对话框 ============
@@ -361,7 +448,7 @@ def show_success(message: str, duration: int = 3):
         duration: 显示时长（秒）
     """
     st.success(f"✅ {message}")
-    logger.info(f"Success: {message}")
+    logger.info("Success: %s", message)
 
 
 def show_warning(message: str):
@@ -372,7 +459,7 @@ def show_warning(message: str):
         message: 警告消息
     """
     st.warning(f"⚠️ {message}")
-    logger.warning(f"Warning: {message}")
+    logger.warning("Warning: %s", message)
 
 
 def show_info(message: str):
@@ -383,37 +470,34 @@ def show_info(message: str):
         message: 信息消息
     """
     st.info(f"ℹ️ {message}")
-    logger.info(f"Info: {message}")
+    logger.info("Info: %s", message)
 
 
 # ============ 加载状态 ============
 
-class LoadingState:
-    """加载状态管理器"""
-
-    def __init__(self, message: str = "处理中..."):
-        """
-        初始化加载状态
+@contextmanager
+def loading_state(message: str = "处理中..."):
+    """
+    加载状态管理器（上下文管理器）
 
-        参数:
-            message: 加载提示消息
-        """
-        self.message = message
-        self.spinner = None
+    参数:
+        message: 加载提示消息
 
-    def __enter__(self):
-        self.spinner = st.spinner(self.message)
-        self.spinner.__enter__()
-        return self
+    使用示例:
+        with LoadingState("正在加载数据..."):
+            load_data()
+    """
+    with st.spinner(message):
+        try:
+            yield
+        except Exception as e:
+            # 发生错误，记录日志后继续抛出
+            logger.error("Error during loading: %s", e)
+            raise
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.spinner:
-            self.spinner.__exit__(exc_type, exc_val, exc_tb)
 
-        if exc_type is not None:
-            # 发生错误，记录日志
-            logger.error(f"Error during loading: {exc_val}")
-        return False
+# 保留原有的类名写法
+LoadingState = loading_state
 
 
 # ============ 重试机制 ============
@@ -422,7 +506,8 @@ def retry_on_error(
     max_retries: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
-    exceptions: tuple = (Exception,)
+    exceptions: tuple = (Exception,),
+    max_delay: float = 30.0
 ):
     """
     错误重试装饰器
@@ -432,6 +517,10 @@ def retry_on_error(
         delay: 初始延迟（秒）
         backoff: 延迟倍数
         exceptions: 需要重试的异常类型
+        max_delay: 单次延迟上限（秒）
+
+    每次实际等待时间在当前延迟的 50%~100% 之间随机取值，
+    避免多个会话同时失败后按相同节奏一起重试
 
     使用示例:
         @retry_on_error(max_retries=3, exceptions=(NetworkError,))
@@ -443,8 +532,6 @@ def retry_on_error(
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
-            import time
-
             current_delay = delay
             last_exception = None
 
@@ -455,16 +542,15 @@ def retry_on_error(
                     last_exception = e
 
                     if attempt < max_retries:
+                        sleep_time = min(current_delay, max_delay) * (0.5 + random.random() * 0.5)
                         logger.warning(
-                            f"Attempt {attempt + 1} failed for {func.__name__}: {str(e)}. "
-                            f"Retrying in {current_delay}s..."
+                            "Attempt %d failed for %s: %s. Retrying in %.2fs...",
+                            attempt + 1, func.__name__, e, sleep_time
                         )
-                        time.sleep(current_delay)
-                        current_delay *= backoff
+                        time.sleep(sleep_time)
+                        current_delay = min(current_delay * backoff, max_delay)
                     else:
-                        logger.error(
-                            f"All {max_retries} retries failed for {func.__name__}"
-                        )
+                        logger.error("All %d retries failed for %s", max_retries, func.__name__)
 
             # 所有重试都失败，抛出最后一个异常
             raise last_exception
@@ -475,47 +561,42 @@ def retry_on_error(
 
 # ============ 异常捕获上下文管理器 ============
 
-class ExceptionHandler:
-    """异常捕获上下文管理器"""
-
-    def __init__(
-        self,
-        error_message: str = "操作失败",
-        show_error: bool = True,
-        log_error: bool = True,
-        raise_error: bool = False
-    ):
-        """
-        初始化异常处理器
+@contextmanager
+def exception_handler(
+    error_message: str = "操作失败",
+    show_error: bool = True,
+    log_error: bool = True,
+    raise_error: bool = False
+):
+    """
+    异常捕获上下文管理器
 
-        参数:
-            error_message: 错误消息
-            show_error: 是否显示错误
-            log_error: 是否记录日志
-            raise_error: 是否重新抛出错误
-        """
-        self.error_message = error_message
-        self.show_error = show_error
-        self.log_error = log_error
-        self.raise_error = raise_error
+    参数:
+        error_message: 错误消息
+        show_error: 是否显示错误
+        log_error: 是否记录日志
+        raise_error: 是否重新抛出错误
 
-    def __enter__(self):
-        return self
+    使用示例:
+        with ExceptionHandler("保存失败"):
+            save_data()
+    """
+    try:
+        yield
+    except Exception as e:
+        # 发生异常
+        if show_error:
+            st.error(f"❌ {error_message}")
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if exc_type is not None:
-            # 发生异常
-            if self.show_error:
-                st.error(f"❌ {self.error_message}")
+        if log_error:
+            logger.error("%s: %s", error_message, e, exc_info=True)
 
-            if self.log_error:
-                logger.error(f"{self.error_message}: {exc_val}")
-                logger.error(traceback.format_exc())
+        if raise_error:
+            raise
 
-            # 不重新抛出异常
-            return True
 
-        return False
+# 保留原有的类名写法
+ExceptionHandler = exception_handler
 
 
 # ============ 导出的便捷函数 ============
@@ -537,6 +618,8 @@ __all__ = [
     'show_warning',
     'show_info',
     'LoadingState',
+    'loading_state',
     'retry_on_error',
     'ExceptionHandler',
+    'exception_handler',
 ]
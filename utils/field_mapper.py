@@ -2,15 +2,24 @@
 """
 字段映射工具
 将策略参数映射到数据库字段
+
+map_parameter_to_field 对 lookback_days / consecutive_days 返回只读映射（types.MappingProxyType），
+结果会被缓存并在调用之间共享：可以按键读取或 .get()，需要修改时请先 dict(...) 复制一份
 """
 
+import functools
 import re
+from types import MappingProxyType
+
+
+# ma_short_1 / ma_long_2 等均线变量参数（模块加载时编译一次）
+_MA_RE = re.compile(r'ma_(?:short|long)_[123]')
 
 
 # ============ 数据库字段注册表 ============
 
-# 直接可用的字段（存在于数据库中）
-DIRECT_FIELDS = {
+# 直接可用的字段（存在于数据库中），只读集合
+DIRECT_FIELDS = frozenset({
     # stock_daily_history 表
     'close', 'open', 'high', 'low', 'volume', 'amount', 'turnover_ratio',
 
@@ -54,25 +63,35 @@ DIRECT_FIELDS = {
 
     # 扩展指标 - 位置指标
     'position_20d', 'position_60d',
-}
+})
 
 
 # ============ 参数到字段的映射规则 ============
 
 def map_parameter_to_field(param_name, param_value=None):
     """
-    将参数名映射到数据库字段名
+    将参数名映射到数据库字段名（结果按 (param_name, param_value) 缓存）
 
     参数:
         param_name: 参数名（如 'ma_period', 'ma_short_1', 'lookback_days'）
-        param_value: 参数值（如 20, 5, 10）
+        param_value: 参数值（如 20, 5, 10）；列表、字典等不可哈希的值不走缓存，按相同规则映射
 
     返回:
         str: 数据库字段名（如 'ma20', 'ma5', 'max_high_20d'）
+             lookback_days / consecutive_days 返回只读映射（MappingProxyType）
 
     异常:
         ValueError: 无法映射的参数
     """
+    try:
+        hash(param_value)
+    except TypeError:
+        return _map_parameter_to_field(param_name, param_value)
+    return _cached_map_parameter_to_field(param_name, param_value)
+
+
+def _map_parameter_to_field(param_name, param_value):
+    """参数到字段的映射规则（纯函数，供 map_parameter_to_field 调用）"""
     # 1. 检查是否是直接字段
     if param_name in DIRECT_FIELDS:
         return param_name
@@ -96,9 +115,8 @@ def map_parameter_to_field(param_name, param_value=None):
     # ma_short_3=20 → ma20
     # ma_long_1=60 → ma60
     # ma_long_2=120 → ma120 (不存在，需要特殊处理)
-    ma_pattern = r'ma_(short|long)_(1|2|3)'
-    match = re.match(ma_pattern, param_name)
-    if match and param_value is not None:
+    # 先用 startswith 过滤，非 ma_ 开头的参数不进入正则
+    if param_value is not None and param_name.startswith('ma_') and _MA_RE.match(param_name):
         return f'ma{int(param_value)}'
 
     # 4. 回溯天数参数映射
@@ -106,23 +124,27 @@ def map_parameter_to_field(param_name, param_value=None):
     # lookback_days=20 在 max_low 上下文中 → max_low_20d
     if param_name == 'lookback_days' and param_value is not None:
         # 返回两个可能的字段，由调用者根据上下文选择
-        return {
+        return MappingProxyType({
             'max_high': f'max_high_{int(param_value)}d',
             'max_low': f'max_low_{int(param_value)}d'
-        }
+        })
 
     # 5. 其他特殊映射
     # consecutive_days=3 → consecutive_up_days 或 consecutive_down_days
     if param_name == 'consecutive_days' and param_value is not None:
-        return {
+        return MappingProxyType({
             'up': 'consecutive_up_days',
             'down': 'consecutive_down_days'
-        }
+        })
 
     # 6. 无法识别的参数
     raise ValueError(f"无法映射参数: {param_name}")
 
 
+# 可哈希参数值的映射结果缓存（策略参数组合有限，重复扫描时直接命中）
+_cached_map_parameter_to_field = functools.lru_cache(maxsize=512)(_map_parameter_to_field)
+
+
 def validate_field_name(field_name):
     """
     验证字段名是否有效（存在于数据库中）
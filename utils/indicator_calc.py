@@ -486,9 +486,10 @@ def save_indicators_to_db(ts_code, df, frequency='d', save_all=False):
         bool: 是否成功
     """
     try:
-        from utils.db_helper import get_db_connection
+        from utils.db_helper import get_db_transaction
 
-        with get_db_connection() as conn:
+        # 经写线程独占写连接，整批在一个事务中写入
+        with get_db_transaction(row_factory=False) as (conn, cursor):
             # 统一使用 trade_date 列（数据库表结构就是 trade_date，不是 timestamp）
             # 将各种日期列名统一为 trade_date
             df = df.copy()
@@ -547,7 +548,6 @@ def save_indicators_to_db(ts_code, df, frequency='d', save_all=False):
                     row.get('atr14')
                 ))
 
-            conn.commit()
             return True
 
     except Exception as e: